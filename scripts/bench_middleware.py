@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.wishlist_api.app.middleware import (  # noqa: E402
+    MAX_REQUEST_SIZE,
+    CorrelationIdMiddleware,
+    RequestSizeLimitMiddleware,
+)
+
+"""
+Usage:
+  python scripts/bench_middleware.py [requests]
+
+Sends the same sequence of small POST requests through a minimal app wrapped
+in the previous BaseHTTPMiddleware implementations and in the current ASGI
+ones from app/middleware.py, then prints per-request latency.
+"""
+
+
+class LegacyCorrelationIdMiddleware(BaseHTTPMiddleware):
+    async def dispatch(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+        request.state.correlation_id = correlation_id
+        response = await call_next(request)
+        response.headers["X-Correlation-ID"] = correlation_id
+        return response
+
+
+class LegacyRequestSizeLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        content_length = request.headers.get("content-length")
+        if content_length and int(content_length) > MAX_REQUEST_SIZE:
+            return Response(status_code=413)
+        return await call_next(request)
+
+
+def build_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(payload: dict) -> dict:
+        return payload
+
+    if legacy:
+        app.add_middleware(LegacyCorrelationIdMiddleware)
+        app.add_middleware(LegacyRequestSizeLimitMiddleware)
+    else:
+        app.add_middleware(CorrelationIdMiddleware)
+        app.add_middleware(RequestSizeLimitMiddleware)
+    return app
+
+
+async def run(legacy: bool, requests: int) -> List[float]:
+    transport = httpx.ASGITransport(app=build_app(legacy))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for _ in range(200):
+            await c.post("/echo", json={"title": "warmup"})
+        timings = []
+        for i in range(requests):
+            started = time.perf_counter()
+            response = await c.post("/echo", json={"title": f"wish {i}"})
+            timings.append((time.perf_counter() - started) * 1_000_000)
+            assert response.status_code == 200
+    return timings
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for name, legacy in (("before", True), ("after", False)):
+        timings = sorted(asyncio.run(run(legacy, requests)))
+        print(
+            f"{name:7} mean={statistics.fmean(timings):7.1f}us "
+            f"p50={timings[len(timings) // 2]:7.1f}us "
+            f"p99={timings[int(len(timings) * 0.99)]:7.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.wishlist_api.adapters.database import (  # noqa: E402
+    apply_sqlite_pragmas,
+    engine_options,
+)
+
+"""
+Usage:
+  python scripts/bench_sqlite_profile.py [threads] [seconds]
+
+Runs the same mixed read/write workload (half the threads insert and commit
+single rows, the other half run owner-scoped reads) against a SQLite file
+with driver defaults and with the production profile from adapters/database.py,
+then prints operations per second and "database is locked" errors.
+"""
+
+
+def build_engine(path: Path, tuned: bool):
+    url = f"sqlite:///{path}"
+    if not tuned:
+        return create_engine(url)
+    engine = create_engine(url, **engine_options(create_engine(url).url))
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+def run(tuned: bool, threads: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(Path(tmp) / "bench.sqlite", tuned)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE TABLE wish (id INTEGER PRIMARY KEY, owner_id INTEGER, "
+                    "title VARCHAR)"
+                )
+            )
+            conn.execute(text("CREATE INDEX ix_wish_owner_id ON wish (owner_id)"))
+
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def worker(n: int) -> None:
+            writer = n % 2 == 0
+            local = {"reads": 0, "writes": 0, "locked": 0}
+            while time.perf_counter() < deadline:
+                try:
+                    with engine.begin() as conn:
+                        if writer:
+                            conn.execute(
+                                text(
+                                    "INSERT INTO wish (owner_id, title) VALUES (:o, 'x')"
+                                ),
+                                {"o": n},
+                            )
+                            local["writes"] += 1
+                        else:
+                            conn.execute(
+                                text("SELECT count(*) FROM wish WHERE owner_id = :o"),
+                                {"o": n - 1},
+                            ).scalar()
+                            local["reads"] += 1
+                except OperationalError:
+                    local["locked"] += 1
+            with lock:
+                for key, value in local.items():
+                    counts[key] += value
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        engine.dispose()
+
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main() -> None:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    for name, tuned in (("default", False), ("tuned", True)):
+        result = run(tuned, threads, seconds)
+        print(
+            f"{name:8} reads/s={result['reads']:9.0f} "
+            f"writes/s={result['writes']:8.0f} locked/s={result['locked']:6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
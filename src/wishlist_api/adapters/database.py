@@ -1,16 +1,128 @@
+import logging
 import os
-from typing import Iterator
+from typing import Any, AsyncIterator, Dict, Iterator
 
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .migrations import run_migrations
+
+logger = logging.getLogger("maintenance")
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:////app/db/database.sqlite")
-engine = create_engine(DATABASE_URL, echo=False)
+
+# Applied to every new SQLite connection; an empty value leaves the default.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+}
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+
+def is_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def is_memory_sqlite(url: URL) -> bool:
+    return is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: URL) -> Dict[str, Any]:
+    if is_memory_sqlite(url):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            if value:
+                cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_engine(target: Engine) -> Engine:
+    if is_sqlite(target.url):
+        event.listen(target, "connect", apply_sqlite_pragmas)
+    return target
+
+
+def sqlite_settings(target: Engine) -> Dict[str, Any]:
+    with target.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in SQLITE_PRAGMAS
+        }
+
+
+def report_engine_settings(target: Engine) -> Dict[str, Any]:
+    settings: Dict[str, Any] = {"pool": target.pool.status()}
+    if is_sqlite(target.url):
+        settings.update(sqlite_settings(target))
+    logger.info(f"Database engine settings: {settings}")
+    return settings
+
+
+def make_engine(url: str) -> Engine:
+    parsed = make_url(url)
+    return configure_engine(create_engine(url, echo=False, **engine_options(parsed)))
+
+
+engine = make_engine(DATABASE_URL)
+
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() == "true"
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+async_engine: AsyncEngine | None = None
+
+
+def async_database_url(url: str) -> str:
+    explicit = os.getenv("ASYNC_DATABASE_URL")
+    if explicit:
+        return explicit
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver known for '{parsed.drivername}'")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    global async_engine
+    if async_engine is None:
+        url = async_database_url(engine.url.render_as_string(hide_password=False))
+        async_engine = create_async_engine(
+            url, echo=False, **engine_options(make_url(url))
+        )
+        configure_engine(async_engine.sync_engine)
+    return async_engine
 
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    report_engine_settings(engine)
 
 
 def get_session() -> Iterator[Session]:
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, List, Set, Tuple
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from .search import create_wish_search
+
+logger = logging.getLogger("maintenance")
+
+MIGRATION_LOCK_TIMEOUT_SECONDS = float(os.getenv("MIGRATION_LOCK_TIMEOUT_SECONDS", 300))
+
+# Migrations must stay idempotent: several workers may start at the same time
+# and a fresh database already has the current schema from create_all().
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+
+def _table_exists(conn: Connection, table: str) -> bool:
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).first()
+    return row is not None
+
+
+def _columns(conn: Connection, table: str) -> Set[str]:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _wish_owner_indexes(conn: Connection) -> None:
+    if "price_cents" not in _columns(conn, "wish"):
+        conn.exec_driver_sql("ALTER TABLE wish ADD COLUMN price_cents INTEGER")
+    conn.exec_driver_sql(
+        "UPDATE wish SET price_cents = CAST(ROUND(price_estimate * 100) AS INTEGER) "
+        "WHERE price_estimate IS NOT NULL AND price_cents IS NULL"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_wish_owner_id_id ON wish (owner_id, id)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_wish_owner_id_price_cents "
+        "ON wish (owner_id, price_cents)"
+    )
+
+
+def _revoked_token_digest(conn: Connection) -> None:
+    if "token" in _columns(conn, "revokedtoken"):
+        rows = conn.exec_driver_sql(
+            "SELECT token, revoked_at, expires_at FROM revokedtoken"
+        ).all()
+        conn.exec_driver_sql("DROP TABLE revokedtoken")
+        conn.exec_driver_sql(
+            "CREATE TABLE revokedtoken ("
+            "id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, "
+            "token_hash VARCHAR(64) NOT NULL, "
+            "revoked_at DATETIME NOT NULL, "
+            "expires_at DATETIME)"
+        )
+        # The unique index has to exist before the copy so that duplicate
+        # legacy tokens are dropped by OR IGNORE instead of failing the index.
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX ix_revokedtoken_token_hash "
+            "ON revokedtoken (token_hash)"
+        )
+        for token, revoked_at, expires_at in rows:
+            conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO revokedtoken (token_hash, revoked_at, expires_at) "
+                "VALUES (?, ?, ?)",
+                (hashlib.sha256(token.encode()).hexdigest(), revoked_at, expires_at),
+            )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_revokedtoken_token_hash "
+        "ON revokedtoken (token_hash)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_revokedtoken_expires_at "
+        "ON revokedtoken (expires_at)"
+    )
+
+
+def _wish_version(conn: Connection) -> None:
+    if "version" not in _columns(conn, "wish"):
+        conn.exec_driver_sql(
+            "ALTER TABLE wish ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+        )
+
+
+MIGRATIONS: List[Migration] = [
+    (1, "wish_owner_indexes", _wish_owner_indexes),
+    (2, "revoked_token_digest", _revoked_token_digest),
+    (3, "wish_version", _wish_version),
+    (4, "wish_search", create_wish_search),
+]
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    with engine.connect() as conn:
+        if not _table_exists(conn, "schema_migrations"):
+            return set()
+        return {
+            row[0]
+            for row in conn.exec_driver_sql("SELECT version FROM schema_migrations")
+        }
+
+
+# pysqlite does not open a transaction before DDL, so the lock is taken
+# explicitly on an autocommit connection. BEGIN IMMEDIATE holds the write lock
+# until COMMIT; other workers wait for it rather than interleave.
+@contextmanager
+def immediate_transaction(engine: Engine) -> Iterator[Connection]:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        deadline = time.monotonic() + MIGRATION_LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                break
+            except OperationalError as exc:
+                if "locked" not in str(exc) or time.monotonic() > deadline:
+                    raise
+        try:
+            yield conn
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+
+def _is_applied(conn: Connection, version: int) -> bool:
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM schema_migrations WHERE version = ?", (version,)
+    ).first()
+    return row is not None
+
+
+def run_migrations(
+    engine: Engine, migrations: List[Migration] = MIGRATIONS
+) -> List[int]:
+    with immediate_transaction(engine) as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER NOT NULL PRIMARY KEY, "
+            "name VARCHAR NOT NULL, "
+            "applied_at DATETIME NOT NULL)"
+        )
+
+    applied = applied_versions(engine)
+    ran = []
+    for version, name, migrate in sorted(migrations, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        with immediate_transaction(engine) as conn:
+            # Another worker may have applied it while this one waited.
+            if _is_applied(conn, version):
+                continue
+            migrate(conn)
+            conn.exec_driver_sql(
+                "INSERT INTO schema_migrations (version, name, applied_at) "
+                "VALUES (?, ?, ?)",
+                (version, name, datetime.utcnow().isoformat(" ")),
+            )
+        logger.info(f"Applied schema migration {version}_{name}")
+        ran.append(version)
+    return ran
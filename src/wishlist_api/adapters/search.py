@@ -0,0 +1,79 @@
+import re
+from typing import Any
+
+from sqlalchemy import Connection, column, event, table
+
+from src.wishlist_api.domain.models import Wish
+
+SEARCH_MAX_TERMS = 8
+SEARCH_TERM = re.compile(r"\w+")
+
+# External-content index over wish: only the token index is stored and the
+# triggers below keep it in step with every write, including bulk statements.
+# owner_id is indexed as a token and ANDed into every match, so a search only
+# reads one owner's rows; its bm25 weight of 0 keeps it out of the score.
+WISH_SEARCH_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS wish_fts USING fts5("
+    "title, notes, owner_id, content='wish', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+WISH_SEARCH_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS wish_fts_insert AFTER INSERT ON wish BEGIN "
+    "INSERT INTO wish_fts (rowid, title, notes, owner_id) "
+    "VALUES (new.id, new.title, new.notes, new.owner_id); END",
+    "CREATE TRIGGER IF NOT EXISTS wish_fts_delete AFTER DELETE ON wish BEGIN "
+    "INSERT INTO wish_fts (wish_fts, rowid, title, notes, owner_id) "
+    "VALUES ('delete', old.id, old.title, old.notes, old.owner_id); END",
+    "CREATE TRIGGER IF NOT EXISTS wish_fts_update "
+    "AFTER UPDATE OF title, notes, owner_id ON wish BEGIN "
+    "INSERT INTO wish_fts (wish_fts, rowid, title, notes, owner_id) "
+    "VALUES ('delete', old.id, old.title, old.notes, old.owner_id); "
+    "INSERT INTO wish_fts (rowid, title, notes, owner_id) "
+    "VALUES (new.id, new.title, new.notes, new.owner_id); END",
+]
+# Title matches outweigh notes; the owner column never contributes to rank.
+WISH_SEARCH_RANK = "bm25(10.0, 2.0, 0.0)"
+
+wish_table = Wish.__table__  # type: ignore[attr-defined]
+wish_fts = table("wish_fts", column("wish_fts"), column("rowid"), column("rank"))
+
+
+def search_table_exists(conn: Connection) -> bool:
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'wish_fts'"
+    ).first()
+    return row is not None
+
+
+def create_wish_search(conn: Connection) -> None:
+    existed = search_table_exists(conn)
+    conn.exec_driver_sql(WISH_SEARCH_TABLE)
+    conn.exec_driver_sql(
+        "INSERT INTO wish_fts (wish_fts, rank) VALUES ('rank', ?)",
+        (WISH_SEARCH_RANK,),
+    )
+    for trigger in WISH_SEARCH_TRIGGERS:
+        conn.exec_driver_sql(trigger)
+    if not existed:
+        conn.exec_driver_sql("INSERT INTO wish_fts (wish_fts) VALUES ('rebuild')")
+
+
+def wish_match_expression(owner_id: int, q: str) -> str | None:
+    terms = SEARCH_TERM.findall(q)[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    # Every term must match; the last one also matches as a prefix.
+    phrases = " ".join(f'"{term}"' for term in terms)
+    return f"owner_id : {owner_id} AND {{title notes}} : ({phrases}*)"
+
+
+@event.listens_for(wish_table, "after_create")
+def _create_search_index(target: Any, connection: Connection, **kw: Any) -> None:
+    if connection.dialect.name == "sqlite":
+        create_wish_search(connection)
+
+
+@event.listens_for(wish_table, "before_drop")
+def _drop_search_index(target: Any, connection: Connection, **kw: Any) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS wish_fts")
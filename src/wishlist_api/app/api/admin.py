@@ -0,0 +1,84 @@
+import logging
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse
+
+from src.wishlist_api.app import security
+from src.wishlist_api.app.security import get_current_user
+from src.wishlist_api.app.utils.profiling import profile_path
+from src.wishlist_api.domain.models import User, UserRole
+from src.wishlist_api.domain.schemas import JwtKeyRingRead
+from src.wishlist_api.shared.errors import (
+    AuthorizationError,
+    NotFoundError,
+    ValidationError,
+)
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+logger = logging.getLogger("audit")
+
+
+@router.get("/profiles/{correlation_id}", response_model=None)
+def download_profile(
+    correlation_id: str,
+    current_user: User = Depends(get_current_user),  # noqa: B008
+) -> FileResponse:
+    if current_user.role != UserRole.admin:
+        raise AuthorizationError()
+
+    path = profile_path(correlation_id)
+    if path is None or not path.is_file():
+        raise NotFoundError()
+    return FileResponse(
+        path,
+        media_type="text/plain",
+        filename=path.name,
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+def key_ring_state() -> JwtKeyRingRead:
+    return JwtKeyRingRead(
+        active=security.key_ring.active_kid, kids=security.key_ring.kids()
+    )
+
+
+@router.get("/jwt-keys", response_model=JwtKeyRingRead)
+def list_jwt_keys(
+    current_user: User = Depends(get_current_user),  # noqa: B008
+) -> JwtKeyRingRead:
+    if current_user.role != UserRole.admin:
+        raise AuthorizationError()
+    return key_ring_state()
+
+
+# Other workers pick the new key up from JWT_KEYRING_FILE; without that file
+# a rotation only reaches the worker that served this request.
+@router.post("/jwt-keys/rotate", response_model=JwtKeyRingRead)
+def rotate_jwt_key(
+    current_user: User = Depends(get_current_user),  # noqa: B008
+) -> JwtKeyRingRead:
+    if current_user.role != UserRole.admin:
+        raise AuthorizationError()
+
+    kid = security.key_ring.rotate()
+    logger.info(f"JWT signing key rotated to {kid} by {current_user.id}")
+    return key_ring_state()
+
+
+@router.delete("/jwt-keys/{kid}", response_model=JwtKeyRingRead)
+def retire_jwt_key(
+    kid: str,
+    current_user: User = Depends(get_current_user),  # noqa: B008
+) -> JwtKeyRingRead:
+    if current_user.role != UserRole.admin:
+        raise AuthorizationError()
+    if security.key_ring.get(kid) is None:
+        raise NotFoundError()
+
+    try:
+        security.key_ring.retire(kid)
+    except RuntimeError as exc:
+        raise ValidationError(str(exc))
+    logger.info(f"JWT key {kid} retired by {current_user.id}")
+    return key_ring_state()
@@ -1,20 +1,26 @@
 import logging
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import DefaultDict, List
+from datetime import timedelta
 
 from fastapi import APIRouter, Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
 
 from src.wishlist_api.adapters.database import get_session
 from src.wishlist_api.app.security import (
     bearer_scheme,
     create_access_token,
     get_current_user,
-    get_password_hash,
+    hash_password_async,
+    invalidate_user,
     logout_user,
-    verify_password,
+    verify_password_async,
+)
+from src.wishlist_api.app.utils.rate_limit import (
+    LOGIN_LIMIT_BUCKETS,
+    LOGIN_LIMIT_STORE,
+    SlidingWindowLimiter,
+    make_attempt_store,
 )
 from src.wishlist_api.domain.models import User, UserRole
 from src.wishlist_api.domain.schemas import Token, UserCreate
@@ -31,77 +37,90 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 logger = logging.getLogger("audit")
 logger.setLevel(logging.INFO)
 
-FAILED_LOGINS: DefaultDict[str, List[datetime]] = defaultdict(list)
 MAX_FAILED = 5
 BLOCK_MINUTES = 15
 
+login_limiter = SlidingWindowLimiter(
+    make_attempt_store(LOGIN_LIMIT_STORE, BLOCK_MINUTES * 60),
+    MAX_FAILED,
+    BLOCK_MINUTES * 60,
+    LOGIN_LIMIT_BUCKETS,
+)
+
 
 def check_rate_limit(ip: str) -> None:
-    now = datetime.utcnow()
-    FAILED_LOGINS[ip] = [
-        t for t in FAILED_LOGINS[ip] if now - t < timedelta(minutes=BLOCK_MINUTES)
-    ]
-    if len(FAILED_LOGINS[ip]) >= MAX_FAILED:
+    if login_limiter.is_limited(ip):
         raise AuthorizationError("Too many login attempts, try later")
 
 
 def record_failed_attempt(ip: str) -> None:
-    FAILED_LOGINS[ip].append(datetime.utcnow())
+    login_limiter.hit(ip)
+
+
+def get_user_by_username(session: Session, username: str) -> User | None:
+    return session.exec(select(User).where(User.username == username)).first()
+
+
+def save_user(session: Session, user: User) -> User:
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def issue_token(user: User) -> Token:
+    access_token = create_access_token(
+        {"sub": str(user.id), "role": user.role.value},
+        expires_delta=timedelta(minutes=15),  # TTL ≤ 15 минут
+    )
+    return Token(access_token=access_token, token_type="bearer")
 
 
 @router.post("/register", response_model=Token)
-def register(
+async def register(
     user_in: UserCreate, session: Session = Depends(get_session)  # noqa B008
 ) -> Token:
-    existing = session.exec(
-        select(User).where(User.username == user_in.username)
-    ).first()
+    existing = await run_in_threadpool(get_user_by_username, session, user_in.username)
     if existing:
         raise UserAlreadyExistsError()
 
+    password_hash = await hash_password_async(user_in.password)
     try:
-        user = User(
-            username=user_in.username,
-            password_hash=get_password_hash(user_in.password),
-            role=UserRole.user,
+        user = await run_in_threadpool(
+            save_user,
+            session,
+            User(
+                username=user_in.username,
+                password_hash=password_hash,
+                role=UserRole.user,
+            ),
         )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
     except Exception:
         raise InternalServerError()
 
-    access_token = create_access_token(
-        {"sub": str(user.id), "role": user.role.value},
-        expires_delta=timedelta(minutes=15),  # TTL ≤ 15 минут
-    )
-
     logger.info(f"User {user.id} registered")
-    return Token(access_token=access_token, token_type="bearer")
+    return issue_token(user)
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     user_in: UserCreate,
     session: Session = Depends(get_session),  # noqa: B008
     ip: str | None = None,
 ) -> Token:
     if ip is None:
         ip = "127.0.0.1"
-    check_rate_limit(ip)
+    await run_in_threadpool(check_rate_limit, ip)
 
-    user = session.exec(select(User).where(User.username == user_in.username)).first()
-    if not user or not verify_password(user_in.password, user.password_hash):
-        record_failed_attempt(ip)
+    user = await run_in_threadpool(get_user_by_username, session, user_in.username)
+    if not user or not await verify_password_async(
+        user_in.password, user.password_hash
+    ):
+        await run_in_threadpool(record_failed_attempt, ip)
         raise AuthenticationError("Invalid credentials")
 
-    access_token = create_access_token(
-        {"sub": str(user.id), "role": user.role.value},
-        expires_delta=timedelta(minutes=15),
-    )
-
     logger.info(f"User {user.id} logged in")
-    return Token(access_token=access_token, token_type="bearer")
+    return issue_token(user)
 
 
 @router.post("/logout", status_code=204)
@@ -135,12 +154,8 @@ def promote_user(
     user.role = UserRole.admin
     session.add(user)
     session.commit()
+    invalidate_user(user.id)
     session.refresh(user)
 
-    access_token = create_access_token(
-        {"sub": str(user.id), "role": user.role.value},
-        expires_delta=timedelta(minutes=15),
-    )
-
     logger.info(f"User {user.id} promoted to admin by {current_user.id}")
-    return Token(access_token=access_token, token_type="bearer")
+    return issue_token(user)
@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.wishlist_api.adapters.database import get_async_session
+from src.wishlist_api.app.api import auth
+from src.wishlist_api.app.api.auth import (
+    check_rate_limit,
+    issue_token,
+    logger,
+    record_failed_attempt,
+)
+from src.wishlist_api.app.security import (
+    bearer_scheme,
+    get_current_user_async,
+    hash_password_async,
+    invalidate_user,
+    logout_user_async,
+    verify_password_async,
+)
+from src.wishlist_api.app.utils.routing import overlay_routes
+from src.wishlist_api.domain.models import User, UserRole
+from src.wishlist_api.domain.schemas import Token, UserCreate
+from src.wishlist_api.shared.errors import (
+    AuthenticationError,
+    AuthorizationError,
+    InternalServerError,
+    NotFoundError,
+    UserAlreadyExistsError,
+)
+
+async_routes = APIRouter(prefix="/auth", tags=["auth"])
+
+
+async def get_user_by_username(session: AsyncSession, username: str) -> User | None:
+    result = await session.exec(select(User).where(User.username == username))
+    return result.first()
+
+
+@async_routes.post("/register", response_model=Token)
+async def register(
+    user_in: UserCreate,
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+) -> Token:
+    if await get_user_by_username(session, user_in.username):
+        raise UserAlreadyExistsError()
+
+    password_hash = await hash_password_async(user_in.password)
+    try:
+        user = User(
+            username=user_in.username,
+            password_hash=password_hash,
+            role=UserRole.user,
+        )
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+    except Exception:
+        raise InternalServerError()
+
+    logger.info(f"User {user.id} registered")
+    return issue_token(user)
+
+
+@async_routes.post("/login", response_model=Token)
+async def login(
+    user_in: UserCreate,
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    ip: str | None = None,
+) -> Token:
+    if ip is None:
+        ip = "127.0.0.1"
+    await run_in_threadpool(check_rate_limit, ip)
+
+    user = await get_user_by_username(session, user_in.username)
+    if not user or not await verify_password_async(
+        user_in.password, user.password_hash
+    ):
+        await run_in_threadpool(record_failed_attempt, ip)
+        raise AuthenticationError("Invalid credentials")
+
+    logger.info(f"User {user.id} logged in")
+    return issue_token(user)
+
+
+@async_routes.post("/logout", status_code=204)
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),  # noqa: B008
+    current_user: User = Depends(get_current_user_async),  # noqa: B008
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+) -> None:
+    try:
+        await logout_user_async(credentials.credentials, session)
+    except Exception:
+        raise InternalServerError()
+
+    logger.info(f"User {current_user.id} logged out")
+
+
+@async_routes.post("/promote/{username}", response_model=Token)
+async def promote_user(
+    username: str,
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    current_user: User = Depends(get_current_user_async),  # noqa: B008
+) -> Token:
+    if current_user.role != UserRole.admin:
+        raise AuthorizationError()
+
+    user = await get_user_by_username(session, username)
+    if not user:
+        raise NotFoundError()
+
+    user.role = UserRole.admin
+    session.add(user)
+    await session.commit()
+    invalidate_user(user.id)
+    await session.refresh(user)
+
+    logger.info(f"User {user.id} promoted to admin by {current_user.id}")
+    return issue_token(user)
+
+
+router = overlay_routes(auth.router, async_routes)
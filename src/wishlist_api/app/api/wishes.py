@@ -1,29 +1,125 @@
-import imghdr
 import os
-import uuid
+import time
 from decimal import Decimal
-from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Union
-
-from fastapi import APIRouter, Depends, File, Query, UploadFile
-from fastapi.responses import Response
-from sqlalchemy import Numeric, cast
-from sqlmodel import Session, select
-
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from fastapi import APIRouter, Depends, File, Header, Query, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from pydantic import ValidationError as SchemaValidationError
+from sqlalchemy import ColumnElement, and_, delete, insert, or_, update
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session, col, select
+from sqlmodel.sql.expression import Select, SelectOfScalar
+from starlette.concurrency import run_in_threadpool
+
+from src.wishlist_api.adapters import database
 from src.wishlist_api.adapters.database import get_session
+from src.wishlist_api.adapters.search import wish_fts, wish_match_expression
 from src.wishlist_api.app.security import get_current_user
-from src.wishlist_api.domain.models import User, Wish
-from src.wishlist_api.domain.schemas import WishCreate, WishRead, WishUpdate
-from src.wishlist_api.shared.errors import NotFoundError, problem
+from src.wishlist_api.app.utils.cache import GroupedLRUCache, LRUCache
+from src.wishlist_api.app.utils.etags import (
+    collection_etag,
+    if_match,
+    none_match,
+    not_modified,
+    resource_etag,
+)
+from src.wishlist_api.app.utils.file_responses import immutable_file_response
+from src.wishlist_api.app.utils.pagination import decode_cursor, encode_cursor
+from src.wishlist_api.app.utils.uploads import (
+    UPLOAD_DIR,
+    blob_filename,
+    release_uploads,
+    release_wish_uploads,
+    save_upload,
+)
+from src.wishlist_api.app.utils.wish_formats import (
+    EXPORT_FIELDS,
+    MEDIA_TYPES,
+    ParsedRecord,
+    WishFormat,
+    WishRecordParser,
+    csv_chunk,
+    ndjson_chunk,
+)
+from src.wishlist_api.domain.models import (
+    UploadBlob,
+    UploadRef,
+    User,
+    Wish,
+    to_minor_units,
+)
+from src.wishlist_api.domain.schemas import (
+    WishBatchCreate,
+    WishBatchRequest,
+    WishBatchResponse,
+    WishBatchResult,
+    WishBatchUpdate,
+    WishCreate,
+    WishImportError,
+    WishImportResult,
+    WishRead,
+    WishUpdate,
+)
+from src.wishlist_api.shared.errors import (
+    AppError,
+    NotFoundError,
+    PayloadTooLargeError,
+    PreconditionFailedError,
+    ValidationError,
+    problem,
+)
 
 router = APIRouter(prefix="/wishes", tags=["wishes"])
 
 
-UPLOAD_DIR = Path("uploads").resolve()
 MAX_FILE_SIZE = 2 * 1024 * 1024
 ALLOWED_MIME = {"image/png", "image/jpeg"}
-
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+IMPORT_MAX_RECORD_SIZE = 64 * 1024
+IMPORT_MAX_REPORTED_ERRORS = 100
+LIST_CACHE_OWNERS = int(os.getenv("LIST_CACHE_OWNERS", 1024))
+LIST_CACHE_PAGES_PER_OWNER = int(os.getenv("LIST_CACHE_PAGES_PER_OWNER", 16))
+LIST_CACHE_TTL_SECONDS = float(os.getenv("LIST_CACHE_TTL_SECONDS", 5))
+
+WishSort = Literal["id", "price", "-price"]
+# Serialized body and headers of a list page.
+CachedPage = Tuple[bytes, Dict[str, str]]
+WishPages = LRUCache[str, CachedPage]
+
+# Rendered list pages per owner, keyed by request URL. Every write path below
+# invalidates the affected owners after its commit; that only reaches this
+# process, so the TTL bounds how long other workers can serve a stale page.
+list_cache: GroupedLRUCache[Optional[int], str, CachedPage] = GroupedLRUCache(
+    LIST_CACHE_OWNERS, LIST_CACHE_PAGES_PER_OWNER
+)
+wish_list_adapter = TypeAdapter(List[WishRead])
+
+SEARCH_MAX_QUERY_LENGTH = 200
+
+# WishUpdate accepts an explicit null for every field; these columns reject it.
+WISH_NOT_NULL_FIELDS = {
+    column.name
+    for column in Wish.__table__.columns  # type: ignore[attr-defined]
+    if not column.nullable
+}
+
+WishQuery = TypeVar(
+    "WishQuery", SelectOfScalar[Wish], Select[Tuple[Optional[int], int]]
+)
 
 
 def as_decimal(value: str | None) -> Decimal | None:
@@ -32,52 +128,541 @@ def as_decimal(value: str | None) -> Decimal | None:
     return Decimal(value)
 
 
+def wish_sort_key(wish: Wish, sort: WishSort) -> List[Any]:
+    if sort == "id":
+        return [wish.id]
+    return [wish.price_cents, wish.id]
+
+
+def wish_order_by(sort: WishSort) -> List[Any]:
+    if sort == "id":
+        return [col(Wish.id)]
+    if sort == "price":
+        return [col(Wish.price_cents), col(Wish.id)]
+    return [col(Wish.price_cents).desc(), col(Wish.id).desc()]
+
+
+# SQLite sorts NULL prices first ascending and last descending; keep that order.
+def after_cursor(sort: WishSort, cursor: str) -> ColumnElement[bool]:
+    values = decode_cursor(cursor, 2 if sort == "id" else 3)
+    if values[0] != sort or not isinstance(values[-1], int):
+        raise ValidationError("Invalid pagination cursor")
+
+    wish_id, last_id = col(Wish.id), values[-1]
+    if sort == "id":
+        return wish_id > last_id
+
+    price, last_price = col(Wish.price_cents), values[1]
+    if last_price is not None and not isinstance(last_price, int):
+        raise ValidationError("Invalid pagination cursor")
+    if sort == "price":
+        if last_price is None:
+            return or_(and_(price.is_(None), wish_id > last_id), price.is_not(None))
+        return or_(price > last_price, and_(price == last_price, wish_id > last_id))
+    if last_price is None:
+        return and_(price.is_(None), wish_id < last_id)
+    return or_(
+        price < last_price,
+        and_(price == last_price, wish_id < last_id),
+        price.is_(None),
+    )
+
+
+def wish_values(wish_in: WishCreate, owner_id: int | None) -> Dict[str, Any]:
+    return {
+        "title": wish_in.title,
+        "price_estimate": wish_in.price_estimate,
+        "price_cents": to_minor_units(wish_in.price_estimate),
+        "link": str(wish_in.link) if wish_in.link is not None else None,
+        "notes": wish_in.notes,
+        "owner_id": owner_id,
+    }
+
+
+def new_wish(wish_in: WishCreate, owner_id: int | None) -> Wish:
+    return Wish(**wish_values(wish_in, owner_id))
+
+
+def wish_update_values(wish_in: WishUpdate) -> Dict[str, Any]:
+    update_data = wish_in.model_dump(exclude_unset=True)
+    if "link" in update_data and update_data["link"] is not None:
+        update_data["link"] = str(update_data["link"])
+    if "price_estimate" in update_data:
+        update_data["price_cents"] = to_minor_units(update_data["price_estimate"])
+    return update_data
+
+
+def null_field_detail(values: Dict[str, Any]) -> str | None:
+    fields = sorted(
+        f for f in WISH_NOT_NULL_FIELDS if f in values and values[f] is None
+    )
+    if not fields:
+        return None
+    return "; ".join(f"{field}: may not be null" for field in fields)
+
+
+def apply_wish_update(wish: Wish, wish_in: WishUpdate) -> None:
+    values = wish_update_values(wish_in)
+    detail = null_field_detail(values)
+    if detail is not None:
+        raise ValidationError(detail)
+    for field, value in values.items():
+        setattr(wish, field, value)
+
+
+def can_access_wish(owner_id: int, user: User) -> bool:
+    return owner_id == user.id or user.role == "admin"
+
+
+def check_wish_access(wish: Wish | None, user: User) -> Wish:
+    if not wish:
+        raise NotFoundError()
+    if not can_access_wish(wish.owner_id, user):
+        raise NotFoundError()
+    return wish
+
+
+def wish_etag(wish: Wish) -> str:
+    return resource_etag(wish.id, wish.version)
+
+
+def wish_version_query(wish_id: int) -> Select[Tuple[int, int]]:
+    return select(Wish.owner_id, Wish.version).where(Wish.id == wish_id)
+
+
+def check_wish_version(wish_id: int, row: Any, user: User) -> str:
+    if row is None or not can_access_wish(row[0], user):
+        raise NotFoundError()
+    return resource_etag(wish_id, row[1])
+
+
+def check_if_match(header: str | None, wish: Wish) -> None:
+    if not if_match(header, wish_etag(wish)):
+        raise PreconditionFailedError()
+
+
+def page_etag(wishes: Sequence[Wish]) -> str:
+    return collection_etag((wish.id, wish.version) for wish in wishes)
+
+
+def filter_wishes(
+    query: WishQuery,
+    user: User,
+    price_min: Decimal | None,
+    price_max: Decimal | None,
+    sort: WishSort,
+    cursor: str | None,
+    offset: int,
+    limit: int,
+) -> WishQuery:
+    query = query.where(Wish.owner_id == user.id)
+    if price_min is not None:
+        query = query.where(col(Wish.price_cents) >= to_minor_units(price_min))
+    if price_max is not None:
+        query = query.where(col(Wish.price_cents) <= to_minor_units(price_max))
+    if cursor is not None:
+        query = query.where(after_cursor(sort, cursor))
+    return query.order_by(*wish_order_by(sort)).offset(offset).limit(limit + 1)
+
+
+def after_search_cursor(cursor: str) -> ColumnElement[bool]:
+    values = decode_cursor(cursor, 3)
+    if (
+        values[0] != "rank"
+        or not isinstance(values[1], (int, float))
+        or not isinstance(values[2], int)
+    ):
+        raise ValidationError("Invalid pagination cursor")
+    rank, rowid = wish_fts.c.rank, wish_fts.c.rowid
+    return or_(rank > values[1], and_(rank == values[1], rowid > values[2]))
+
+
+# Best matches first: FTS5 ranks are negated bm25 scores. The cursor keeps the
+# last (rank, rowid), so every page costs the same however deep it is. Ranks
+# are recomputed per request, so writes between pages can move a row across a
+# page boundary: search pagination is best-effort and pages are not cached.
+def search_wishes_query(
+    owner_id: int, match: str, cursor: str | None, limit: int
+) -> Select[Tuple[Wish, float]]:
+    query = (
+        select(Wish, wish_fts.c.rank)
+        .join(wish_fts, wish_fts.c.rowid == Wish.id)
+        .where(wish_fts.c.wish_fts.match(match), Wish.owner_id == owner_id)
+    )
+    if cursor is not None:
+        query = query.where(after_search_cursor(cursor))
+    return query.order_by(wish_fts.c.rank, wish_fts.c.rowid).limit(limit + 1)
+
+
+def list_wishes_query(*filters: Any) -> SelectOfScalar[Wish]:
+    return filter_wishes(select(Wish), *filters)
+
+
+# Same page as list_wishes_query, without loading the rows.
+def page_versions_query(*filters: Any) -> Select[Tuple[Optional[int], int]]:
+    return filter_wishes(select(col(Wish.id), col(Wish.version)), *filters)
+
+
+def paginate(
+    request: Request,
+    wishes: Sequence[Wish],
+    sort: WishSort,
+    limit: int,
+) -> Tuple[Sequence[Wish], Dict[str, str]]:
+    if len(wishes) <= limit:
+        return wishes, {}
+
+    wishes = wishes[:limit]
+    next_cursor = encode_cursor(sort, *wish_sort_key(wishes[-1], sort))
+    return wishes, next_page_headers(request, next_cursor)
+
+
+def next_page_headers(request: Request, next_cursor: str) -> Dict[str, str]:
+    next_url = request.url.remove_query_params("offset").include_query_params(
+        cursor=next_cursor
+    )
+    return {"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": next_cursor}
+
+
+def dump_wish_page(page: Sequence[Wish], headers: Dict[str, str]) -> CachedPage:
+    body = wish_list_adapter.dump_json(
+        wish_list_adapter.validate_python(page, from_attributes=True)
+    )
+    return body, headers
+
+
+def render_wish_page(
+    request: Request,
+    wishes: Sequence[Wish],
+    sort: WishSort,
+    limit: int,
+) -> CachedPage:
+    etag = page_etag(wishes)
+    page, headers = paginate(request, wishes, sort, limit)
+    return dump_wish_page(page, {"ETag": etag, **headers})
+
+
+def render_search_page(request: Request, rows: Sequence[Any], limit: int) -> CachedPage:
+    wishes = [wish for wish, _ in rows[:limit]]
+    headers = {"ETag": page_etag(wishes)}
+    if len(rows) > limit:
+        last_wish, last_rank = rows[limit - 1]
+        next_cursor = encode_cursor("rank", last_rank, last_wish.id)
+        headers.update(next_page_headers(request, next_cursor))
+    return dump_wish_page(wishes, headers)
+
+
+def page_response(page: CachedPage, if_none_match: str | None, hit: bool) -> Response:
+    body, headers = page
+    if none_match(if_none_match, headers["ETag"]):
+        return not_modified(headers["ETag"])
+    return Response(
+        body,
+        media_type="application/json",
+        headers={**headers, "X-Cache": "HIT" if hit else "MISS"},
+    )
+
+
+def cached_wish_page(
+    request: Request, user: User
+) -> Tuple[WishPages, CachedPage | None]:
+    pages = list_cache.group(user.id)
+    return pages, list_cache.get(pages, str(request.url))
+
+
+def cache_wish_page(pages: WishPages, request: Request, page: CachedPage) -> None:
+    pages.set(str(request.url), page, expires_at=time.time() + LIST_CACHE_TTL_SECONDS)
+
+
+def invalidate_wish_lists(*owner_ids: int | None) -> None:
+    for owner_id in set(owner_ids):
+        list_cache.invalidate(owner_id)
+
+
 @router.post("/", response_model=WishRead)
 def create_wish(
     wish_in: WishCreate,
     session: Session = Depends(get_session),  # noqa: B008
     user: User = Depends(get_current_user),  # noqa: B008
 ) -> Wish:
-    db_wish = Wish(
-        title=wish_in.title,
-        price_estimate=wish_in.price_estimate,
-        link=str(wish_in.link) if wish_in.link is not None else None,
-        notes=wish_in.notes,
-        owner_id=user.id,
-    )
+    db_wish = new_wish(wish_in, user.id)
 
     session.add(db_wish)
     session.commit()
+    invalidate_wish_lists(user.id)
     session.refresh(db_wish)
     return db_wish
 
 
 @router.get("/", response_model=List[WishRead])
 def list_wishes(
+    request: Request,
     price: Decimal | None = Query(None),  # noqa: B008
+    price_min: Decimal | None = Query(None, ge=0),  # noqa: B008
+    price_max: Decimal | None = Query(None, ge=0),  # noqa: B008
+    sort: WishSort = Query("id"),  # noqa: B008
     limit: int = Query(50, ge=1, le=100),  # noqa: B008
     offset: int = Query(0, ge=0),  # noqa: B008
+    cursor: str | None = Query(None),  # noqa: B008
+    if_none_match: str | None = Header(None),  # noqa: B008
+    session: Session = Depends(get_session),  # noqa: B008
+    user: User = Depends(get_current_user),  # noqa: B008
+) -> Response:
+    pages, cached = cached_wish_page(request, user)
+    if cached is not None:
+        return page_response(cached, if_none_match, hit=True)
+
+    if price_max is None:
+        price_max = price
+    filters = (user, price_min, price_max, sort, cursor, offset, limit)
+    if if_none_match is not None:
+        etag = collection_etag(session.exec(page_versions_query(*filters)).all())
+        if none_match(if_none_match, etag):
+            return not_modified(etag)
+
+    wishes = session.exec(list_wishes_query(*filters)).all()
+    page = render_wish_page(request, wishes, sort, limit)
+    cache_wish_page(pages, request, page)
+    return page_response(page, None, hit=False)
+
+
+@router.get("/search", response_model=List[WishRead])
+def search_wishes(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_QUERY_LENGTH),  # noqa: B008
+    limit: int = Query(20, ge=1, le=100),  # noqa: B008
+    cursor: str | None = Query(None),  # noqa: B008
+    if_none_match: str | None = Header(None),  # noqa: B008
+    session: Session = Depends(get_session),  # noqa: B008
+    user: User = Depends(get_current_user),  # noqa: B008
+) -> Response:
+    if user.id is None:
+        raise NotFoundError()
+    match = wish_match_expression(user.id, q)
+    rows: Sequence[Any] = []
+    if match is not None:
+        query = search_wishes_query(user.id, match, cursor, limit)
+        rows = session.execute(query).all()
+    page = render_search_page(request, rows, limit)
+    return page_response(page, if_none_match, hit=False)
+
+
+@router.post("/batch", response_model=WishBatchResponse)
+def batch_wishes(
+    batch: WishBatchRequest,
     session: Session = Depends(get_session),  # noqa: B008
     user: User = Depends(get_current_user),  # noqa: B008
-) -> Sequence[Wish]:
-    query = select(Wish).where(Wish.owner_id == user.id)
-    if price is not None:
-        query = query.where(cast(Wish.price_estimate, Numeric) <= price)
-    query = query.offset(offset).limit(limit)
-    return session.exec(query).all()
+) -> WishBatchResponse:
+    results = [
+        WishBatchResult(index=i, op=op.op, status=0)
+        for i, op in enumerate(batch.operations)
+    ]
+
+    target_ids = {
+        op.id for op in batch.operations if not isinstance(op, WishBatchCreate)
+    }
+    allowed: set[int] = set()
+    versions: Dict[int, int] = {}
+    owners: set[int] = set()
+    if target_ids:
+        rows = session.exec(
+            select(Wish.id, Wish.owner_id, Wish.version).where(
+                col(Wish.id).in_(target_ids)
+            )
+        ).all()
+        versions = {
+            wish_id: version
+            for wish_id, owner_id, version in rows
+            if wish_id is not None and can_access_wish(owner_id, user)
+        }
+        allowed = set(versions)
+        owners = {
+            owner_id for _, owner_id, _ in rows if can_access_wish(owner_id, user)
+        }
+
+    creates: List[Tuple[WishBatchResult, Dict[str, Any]]] = []
+    updates: List[Dict[str, Any]] = []
+    deletes: List[int] = []
+    seen: set[int] = set()
+    for op, result in zip(batch.operations, results):
+        if isinstance(op, WishBatchCreate):
+            creates.append((result, wish_values(op.data, user.id)))
+            continue
+
+        result.id = op.id
+        if op.id in seen:
+            result.status, result.detail = 409, "Duplicate wish id in batch"
+            continue
+        seen.add(op.id)
+        if op.id not in allowed:
+            result.status, result.detail = 404, "Resource not found"
+            continue
+
+        if isinstance(op, WishBatchUpdate):
+            values = wish_update_values(op.data)
+            detail = null_field_detail(values)
+            if detail is not None:
+                result.status, result.detail = 422, detail
+                continue
+            if values:
+                updates.append({"id": op.id, "version": versions[op.id], **values})
+            result.status = 200
+        else:
+            deletes.append(op.id)
+            result.status = 204
+
+    if creates:
+        new_ids = session.scalars(
+            insert(Wish).returning(col(Wish.id), sort_by_parameter_order=True),
+            [values for _, values in creates],
+        ).all()
+        for (result, _), wish_id in zip(creates, new_ids):
+            result.id, result.status = wish_id, 201
+    try:
+        if updates:
+            session.execute(update(Wish), updates)
+        if deletes:
+            release_wish_uploads(session, deletes)
+            session.execute(delete(Wish).where(col(Wish.id).in_(deletes)))
+        session.commit()
+    except StaleDataError:
+        session.rollback()
+        raise PreconditionFailedError("A wish in the batch was modified concurrently")
+    invalidate_wish_lists(user.id, *owners)
+
+    return WishBatchResponse(results=results)
+
+
+def export_rows(owner_id: int, chunk_size: int) -> Iterator[List[Any]]:
+    columns = [getattr(Wish, field) for field in EXPORT_FIELDS]
+    last_id = 0
+    # Keyset chunks keep each read transaction short instead of pinning one
+    # snapshot (and the WAL) for the whole export.
+    while True:
+        with Session(database.engine) as session:
+            rows = session.exec(
+                select(*columns)
+                .where(Wish.owner_id == owner_id, col(Wish.id) > last_id)
+                .order_by(col(Wish.id))
+                .limit(chunk_size)
+            ).all()
+        if not rows:
+            return
+        yield [tuple(row) for row in rows]
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def export_stream(owner_id: int, fmt: WishFormat) -> Iterator[str]:
+    if fmt == "csv":
+        yield csv_chunk([], header=True)
+    for rows in export_rows(owner_id, EXPORT_CHUNK_SIZE):
+        yield csv_chunk(rows) if fmt == "csv" else ndjson_chunk(rows)
+
+
+@router.get("/export", response_model=None)
+def export_wishes(
+    fmt: WishFormat = Query("ndjson", alias="format"),  # noqa: B008
+    user: User = Depends(get_current_user),  # noqa: B008
+) -> StreamingResponse:
+    if user.id is None:
+        raise NotFoundError()
+    return StreamingResponse(
+        export_stream(user.id, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="wishes.{fmt}"'},
+    )
+
+
+def insert_wishes(rows: List[Dict[str, Any]]) -> None:
+    with Session(database.engine) as session:
+        session.execute(insert(Wish), rows)
+        session.commit()
+
+
+def schema_error_detail(exc: SchemaValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+class WishImporter:
+    def __init__(self, owner_id: int | None, batch_size: int) -> None:
+        self.owner_id = owner_id
+        self.batch_size = batch_size
+        self.result = WishImportResult()
+        self._batch: List[Dict[str, Any]] = []
+
+    def reject(self, line: int, detail: str) -> None:
+        self.result.rejected += 1
+        if len(self.result.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            self.result.errors.append(WishImportError(line=line, detail=detail))
+
+    async def add(self, records: Iterator[ParsedRecord]) -> None:
+        for line, record, error in records:
+            if record is None:
+                self.reject(line, error or "Invalid record")
+                continue
+            try:
+                wish_in = WishCreate.model_validate(record)
+            except SchemaValidationError as exc:
+                self.reject(line, schema_error_detail(exc))
+                continue
+            self._batch.append(wish_values(wish_in, self.owner_id))
+            if len(self._batch) >= self.batch_size:
+                await self.flush()
+
+    async def flush(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        await run_in_threadpool(insert_wishes, batch)
+        invalidate_wish_lists(self.owner_id)
+        self.result.accepted += len(batch)
+
+
+@router.post("/import", response_model=WishImportResult)
+async def import_wishes(
+    request: Request,
+    fmt: WishFormat = Query("ndjson", alias="format"),  # noqa: B008
+    user: User = Depends(get_current_user),  # noqa: B008
+) -> WishImportResult:
+    parser = WishRecordParser(fmt, IMPORT_MAX_RECORD_SIZE)
+    importer = WishImporter(user.id, IMPORT_BATCH_SIZE)
+
+    try:
+        async for chunk in request.stream():
+            await importer.add(parser.feed(chunk))
+    except PayloadTooLargeError:
+        await importer.flush()
+        raise PayloadTooLargeError(
+            f"Import stopped after {importer.result.accepted} rows: "
+            "body exceeds the import size limit"
+        )
+    await importer.add(parser.close())
+    await importer.flush()
+
+    return importer.result
 
 
 @router.get("/{wish_id}", response_model=WishRead)
 def get_wish(
     wish_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),  # noqa: B008
     session: Session = Depends(get_session),  # noqa: B008
     user: User = Depends(get_current_user),  # noqa: B008
-) -> Wish:
-    wish = session.get(Wish, wish_id)
-    if not wish:
-        raise NotFoundError()
-    if wish.owner_id != user.id and user.role != "admin":
-        raise NotFoundError()
+) -> Wish | Response:
+    if if_none_match is not None:
+        row = session.exec(wish_version_query(wish_id)).first()
+        etag = check_wish_version(wish_id, row, user)
+        if none_match(if_none_match, etag):
+            return not_modified(etag)
+
+    wish = check_wish_access(session.get(Wish, wish_id), user)
+    response.headers["ETag"] = wish_etag(wish)
     return wish
 
 
@@ -85,49 +670,61 @@ def get_wish(
 def update_wish(
     wish_id: int,
     wish_in: WishUpdate,
+    response: Response,
+    if_match_header: str | None = Header(None, alias="If-Match"),  # noqa: B008
     session: Session = Depends(get_session),  # noqa: B008
     user: User = Depends(get_current_user),  # noqa: B008
 ) -> Wish:
-    wish = session.get(Wish, wish_id)
-    if not wish:
-        raise NotFoundError()
-    if wish.owner_id != user.id and user.role != "admin":
-        raise NotFoundError()
+    wish = check_wish_access(session.get(Wish, wish_id), user)
+    check_if_match(if_match_header, wish)
 
-    update_data = wish_in.dict(exclude_unset=True)
-    if "link" in update_data and update_data["link"] is not None:
-        update_data["link"] = str(update_data["link"])
-
-    for field, value in update_data.items():
-        setattr(wish, field, value)
+    apply_wish_update(wish, wish_in)
     session.add(wish)
-    session.commit()
+    try:
+        session.commit()
+    except StaleDataError:
+        session.rollback()
+        raise PreconditionFailedError()
+    invalidate_wish_lists(wish.owner_id)
     session.refresh(wish)
+    response.headers["ETag"] = wish_etag(wish)
     return wish
 
 
 @router.delete("/{wish_id}")
 def delete_wish(
     wish_id: int,
+    if_match_header: str | None = Header(None, alias="If-Match"),  # noqa: B008
     session: Session = Depends(get_session),  # noqa: B008
     user: User = Depends(get_current_user),  # noqa: B008
 ) -> Dict[str, str]:
-    wish = session.get(Wish, wish_id)
-    if not wish:
-        raise NotFoundError()
-    if wish.owner_id != user.id and user.role != "admin":
-        raise NotFoundError()
+    wish = check_wish_access(session.get(Wish, wish_id), user)
+    check_if_match(if_match_header, wish)
+    owner_id = wish.owner_id
 
+    release_wish_uploads(session, [wish_id])
     session.delete(wish)
-    session.commit()
+    try:
+        session.commit()
+    except StaleDataError:
+        session.rollback()
+        raise PreconditionFailedError()
+    invalidate_wish_lists(owner_id)
     return {"message": "Wish deleted successfully"}
 
 
+def check_upload_target(session: Session, wish_id: int | None, user: User) -> None:
+    if wish_id is not None:
+        check_wish_access(session.get(Wish, wish_id), user)
+
+
 @router.post("/upload", response_model=None)
 async def upload_wish_file(
     file: UploadFile = File(...),  # noqa: B008
+    wish_id: int | None = Query(None),  # noqa: B008
+    session: Session = Depends(get_session),  # noqa: B008
     user: User = Depends(get_current_user),  # noqa: B008
-) -> Union[Dict[str, Optional[Union[str, int]]], Response]:
+) -> Union[Dict[str, Optional[Union[str, int, bool]]], Response]:
 
     if file.content_type not in ALLOWED_MIME:
         return problem(
@@ -136,33 +733,6 @@ async def upload_wish_file(
             detail="File type is not supported.",
         )
 
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        return problem(
-            status=413,
-            title="Payload Too Large",
-            detail="File exceeds allowed limit",
-        )
-    image_type = imghdr.what(None, content)
-    detected_mime = f"image/{image_type}" if image_type else None
-
-    if detected_mime not in ALLOWED_MIME:
-        return problem(
-            status=415,
-            title="Invalid File Content",
-            detail="File content does not match allowed formats",
-        )
-
-    filename = f"{uuid.uuid4()}.{'png' if 'png' in detected_mime else 'jpg'}"
-    safe_path = (UPLOAD_DIR / filename).resolve()
-
-    if not str(safe_path).startswith(str(UPLOAD_DIR)):
-        return problem(
-            status=400,
-            title="Invalid File Path",
-            detail="Invalid file destination",
-        )
-
     if UPLOAD_DIR.is_symlink():
         return problem(
             status=500,
@@ -170,16 +740,23 @@ async def upload_wish_file(
             detail="Upload directory misconfigured.",
         )
 
+    if user.id is None:
+        raise NotFoundError()
+    await run_in_threadpool(check_upload_target, session, wish_id, user)
+
     try:
-        fd = os.open(safe_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
-        with os.fdopen(fd, "wb") as f:
-            f.write(content)
-    except FileExistsError:
-        return problem(
-            status=409,
-            title="File Conflict",
-            detail="File already exists.",
+        stored = await run_in_threadpool(
+            save_upload,
+            session,
+            file.file,
+            UPLOAD_DIR,
+            user.id,
+            wish_id,
+            MAX_FILE_SIZE,
+            ALLOWED_MIME,
         )
+    except AppError:
+        raise
     except Exception:
         return problem(
             status=500,
@@ -188,8 +765,54 @@ async def upload_wish_file(
         )
 
     return {
-        "filename": filename,
-        "mime": detected_mime,
-        "size": len(content),
-        "owner_id": int(user.id) if user.id is not None else None,
+        "id": stored.ref.id,
+        "filename": stored.filename,
+        "mime": stored.blob.mime,
+        "size": stored.blob.size,
+        "sha256": stored.blob.sha256,
+        "deduplicated": stored.deduplicated,
+        "wish_id": wish_id,
+        "owner_id": user.id,
     }
+
+
+@router.api_route("/upload/{upload_id}", methods=["GET", "HEAD"], response_model=None)
+def download_wish_file(
+    upload_id: int,
+    request: Request,
+    session: Session = Depends(get_session),  # noqa: B008
+    user: User = Depends(get_current_user),  # noqa: B008
+) -> Response:
+    row = session.exec(
+        select(UploadRef.owner_id, UploadBlob.sha256, UploadBlob.mime)
+        .join(UploadBlob, col(UploadBlob.sha256) == col(UploadRef.sha256))
+        .where(UploadRef.id == upload_id)
+    ).first()
+    if row is None or not can_access_wish(row[0], user):
+        raise NotFoundError()
+
+    _, sha256, mime = row
+    try:
+        return immutable_file_response(
+            UPLOAD_DIR / blob_filename(sha256, mime),
+            mime,
+            f'"{sha256}"',
+            request.headers,
+        )
+    except FileNotFoundError:
+        raise NotFoundError()
+
+
+@router.delete("/upload/{upload_id}")
+def delete_wish_file(
+    upload_id: int,
+    session: Session = Depends(get_session),  # noqa: B008
+    user: User = Depends(get_current_user),  # noqa: B008
+) -> Dict[str, str]:
+    ref = session.get(UploadRef, upload_id)
+    if ref is None or not can_access_wish(ref.owner_id, user):
+        raise NotFoundError()
+
+    release_uploads(session, col(UploadRef.id) == upload_id)
+    session.commit()
+    return {"message": "Upload deleted successfully"}
@@ -0,0 +1,178 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import Response
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.wishlist_api.adapters.database import get_async_session
+from src.wishlist_api.adapters.search import wish_match_expression
+from src.wishlist_api.app.api import wishes
+from src.wishlist_api.app.api.wishes import (
+    SEARCH_MAX_QUERY_LENGTH,
+    WishSort,
+    apply_wish_update,
+    cache_wish_page,
+    cached_wish_page,
+    check_if_match,
+    check_wish_access,
+    check_wish_version,
+    invalidate_wish_lists,
+    list_wishes_query,
+    new_wish,
+    page_response,
+    page_versions_query,
+    render_search_page,
+    render_wish_page,
+    search_wishes_query,
+    wish_etag,
+    wish_version_query,
+)
+from src.wishlist_api.app.security import get_current_user_async
+from src.wishlist_api.app.utils.etags import collection_etag, none_match, not_modified
+from src.wishlist_api.app.utils.routing import overlay_routes
+from src.wishlist_api.app.utils.uploads import release_wish_uploads
+from src.wishlist_api.domain.models import User, Wish
+from src.wishlist_api.domain.schemas import WishCreate, WishRead, WishUpdate
+from src.wishlist_api.shared.errors import NotFoundError, PreconditionFailedError
+
+async_routes = APIRouter(prefix="/wishes", tags=["wishes"])
+
+
+@async_routes.post("/", response_model=WishRead)
+async def create_wish(
+    wish_in: WishCreate,
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    user: User = Depends(get_current_user_async),  # noqa: B008
+) -> Wish:
+    db_wish = new_wish(wish_in, user.id)
+
+    session.add(db_wish)
+    await session.commit()
+    invalidate_wish_lists(user.id)
+    await session.refresh(db_wish)
+    return db_wish
+
+
+@async_routes.get("/", response_model=List[WishRead])
+async def list_wishes(
+    request: Request,
+    price: Decimal | None = Query(None),  # noqa: B008
+    price_min: Decimal | None = Query(None, ge=0),  # noqa: B008
+    price_max: Decimal | None = Query(None, ge=0),  # noqa: B008
+    sort: WishSort = Query("id"),  # noqa: B008
+    limit: int = Query(50, ge=1, le=100),  # noqa: B008
+    offset: int = Query(0, ge=0),  # noqa: B008
+    cursor: str | None = Query(None),  # noqa: B008
+    if_none_match: str | None = Header(None),  # noqa: B008
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    user: User = Depends(get_current_user_async),  # noqa: B008
+) -> Response:
+    pages, cached = cached_wish_page(request, user)
+    if cached is not None:
+        return page_response(cached, if_none_match, hit=True)
+
+    if price_max is None:
+        price_max = price
+    filters = (user, price_min, price_max, sort, cursor, offset, limit)
+    if if_none_match is not None:
+        versions = (await session.exec(page_versions_query(*filters))).all()
+        etag = collection_etag(versions)
+        if none_match(if_none_match, etag):
+            return not_modified(etag)
+
+    wishes_page = (await session.exec(list_wishes_query(*filters))).all()
+    page = render_wish_page(request, wishes_page, sort, limit)
+    cache_wish_page(pages, request, page)
+    return page_response(page, None, hit=False)
+
+
+@async_routes.get("/search", response_model=List[WishRead])
+async def search_wishes(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_QUERY_LENGTH),  # noqa: B008
+    limit: int = Query(20, ge=1, le=100),  # noqa: B008
+    cursor: str | None = Query(None),  # noqa: B008
+    if_none_match: str | None = Header(None),  # noqa: B008
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    user: User = Depends(get_current_user_async),  # noqa: B008
+) -> Response:
+    if user.id is None:
+        raise NotFoundError()
+    match = wish_match_expression(user.id, q)
+    rows: Sequence[Any] = []
+    if match is not None:
+        query = search_wishes_query(user.id, match, cursor, limit)
+        rows = (await session.execute(query)).all()
+    page = render_search_page(request, rows, limit)
+    return page_response(page, if_none_match, hit=False)
+
+
+@async_routes.get("/{wish_id}", response_model=WishRead)
+async def get_wish(
+    wish_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),  # noqa: B008
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    user: User = Depends(get_current_user_async),  # noqa: B008
+) -> Wish | Response:
+    if if_none_match is not None:
+        row = (await session.exec(wish_version_query(wish_id))).first()
+        etag = check_wish_version(wish_id, row, user)
+        if none_match(if_none_match, etag):
+            return not_modified(etag)
+
+    wish = check_wish_access(await session.get(Wish, wish_id), user)
+    response.headers["ETag"] = wish_etag(wish)
+    return wish
+
+
+@async_routes.patch("/{wish_id}", response_model=WishRead)
+async def update_wish(
+    wish_id: int,
+    wish_in: WishUpdate,
+    response: Response,
+    if_match_header: str | None = Header(None, alias="If-Match"),  # noqa: B008
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    user: User = Depends(get_current_user_async),  # noqa: B008
+) -> Wish:
+    wish = check_wish_access(await session.get(Wish, wish_id), user)
+    check_if_match(if_match_header, wish)
+
+    apply_wish_update(wish, wish_in)
+    session.add(wish)
+    try:
+        await session.commit()
+    except StaleDataError:
+        await session.rollback()
+        raise PreconditionFailedError()
+    invalidate_wish_lists(wish.owner_id)
+    await session.refresh(wish)
+    response.headers["ETag"] = wish_etag(wish)
+    return wish
+
+
+@async_routes.delete("/{wish_id}")
+async def delete_wish(
+    wish_id: int,
+    if_match_header: str | None = Header(None, alias="If-Match"),  # noqa: B008
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+    user: User = Depends(get_current_user_async),  # noqa: B008
+) -> Dict[str, str]:
+    wish = check_wish_access(await session.get(Wish, wish_id), user)
+    check_if_match(if_match_header, wish)
+    owner_id = wish.owner_id
+
+    await session.run_sync(release_wish_uploads, [wish_id])
+    await session.delete(wish)
+    try:
+        await session.commit()
+    except StaleDataError:
+        await session.rollback()
+        raise PreconditionFailedError()
+    invalidate_wish_lists(owner_id)
+    return {"message": "Wish deleted successfully"}
+
+
+router = overlay_routes(wishes.router, async_routes)
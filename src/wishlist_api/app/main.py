@@ -1,24 +1,68 @@
+import os
 from typing import Dict
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from sqlmodel import Session
 
+from src.wishlist_api.adapters import database
 from src.wishlist_api.adapters.database import init_db
-from src.wishlist_api.app.api import auth, wishes
+from src.wishlist_api.app.api import admin, auth, auth_async, wishes, wishes_async
+from src.wishlist_api.app.api.wishes import list_cache
 from src.wishlist_api.app.middleware import (
     CorrelationIdMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    RateLimitMiddleware,
     RequestSizeLimitMiddleware,
 )
-from src.wishlist_api.shared.errors import AppError, problem
+from src.wishlist_api.app.security import hashing_executor, token_cache, user_cache
+from src.wishlist_api.app.utils.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    CallbackGauge,
+    StatsCollector,
+    instrument_queries,
+    registry,
+)
+from src.wishlist_api.app.utils.token_sweeper import token_sweeper
+from src.wishlist_api.app.utils.token_utils import revocation_cache
+from src.wishlist_api.app.utils.uploads import blob_collector
+from src.wishlist_api.shared.errors import AppError, NotFoundError, problem
+
+# /metrics carries no authentication so scrapers can reach it; it stays off
+# unless the deployment keeps that path off the public listener.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
 
 app = FastAPI(title="Wishlist API")
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(CorrelationIdMiddleware)
 app.add_middleware(RequestSizeLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+instrument_queries()
+registry.register(
+    CallbackGauge(
+        "password_hash_busy_slots",
+        "Queued or running jobs in the argon2 executor",
+        hashing_executor.busy,
+    )
+)
+registry.register(StatsCollector("list_cache", list_cache.stats))
+registry.register(StatsCollector("token_cache", token_cache.stats))
+registry.register(StatsCollector("user_cache", user_cache.stats))
+registry.register(StatsCollector("token_sweeper", token_sweeper.stats))
+registry.register(StatsCollector("upload_collector", blob_collector.stats))
 
-app.include_router(auth.router, prefix="/api/v1")
-app.include_router(wishes.router, prefix="/api/v1")
+if database.USE_ASYNC_DB:
+    app.include_router(auth_async.router, prefix="/api/v1")
+    app.include_router(wishes_async.router, prefix="/api/v1")
+else:
+    app.include_router(auth.router, prefix="/api/v1")
+    app.include_router(wishes.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
 
 
 @app.get("/health")
@@ -26,9 +70,32 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    if not METRICS_ENABLED:
+        raise NotFoundError()
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    with Session(database.engine) as session:
+        revocation_cache.load(session)
+
+
+@app.on_event("startup")
+async def start_background_tasks() -> None:
+    token_sweeper.start()
+    blob_collector.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks() -> None:
+    await token_sweeper.stop()
+    await blob_collector.stop()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
 
 
 @app.exception_handler(RequestValidationError)
@@ -1,47 +1,336 @@
+import math
+import os
+import time
 import uuid
-from typing import Awaitable, Callable
+from typing import Any, Callable, Dict, List, Tuple
 
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from src.wishlist_api.shared.errors import problem
+from src.wishlist_api.app.security import is_admin_token
+from src.wishlist_api.app.utils.metrics import request_duration, requests_in_flight
+from src.wishlist_api.app.utils.profiling import (
+    PROFILE_HEADER,
+    StackSampler,
+    profile_lock,
+    profile_path,
+    save_profile,
+)
+from src.wishlist_api.app.utils.rate_limit import (
+    RateBudget,
+    RateDecision,
+    TokenBucketLimiter,
+)
+from src.wishlist_api.app.utils.token_utils import token_digest
+from src.wishlist_api.shared.errors import PayloadTooLargeError, problem
 
 MAX_REQUEST_SIZE = 2 * 1024 * 1024
+IMPORT_MAX_REQUEST_SIZE = int(os.getenv("IMPORT_MAX_REQUEST_SIZE", 50 * 1024 * 1024))
 
+# Routes that stream their body and get a larger budget.
+REQUEST_SIZE_LIMITS: Dict[str, int] = {
+    "/api/v1/wishes/import": IMPORT_MAX_REQUEST_SIZE,
+}
 
-class CorrelationIdMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
-        request.state.correlation_id = correlation_id
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 120))
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 10))
+RATE_LIMIT_IP_FACTOR = int(os.getenv("RATE_LIMIT_IP_FACTOR", 4))
+
+# (method, path prefix, budget); the first match wins. Budgets are per bearer
+# token, and per client address scaled by RATE_LIMIT_IP_FACTOR.
+RATE_LIMIT_BUDGETS: List[Tuple[str | None, str, RateBudget]] = [
+    ("POST", "/api/v1/wishes/upload", RateBudget("upload", 10, 0.2)),
+    ("POST", "/api/v1/wishes/import", RateBudget("import", 3, 0.05)),
+    ("POST", "/api/v1/wishes/batch", RateBudget("batch", 20, 1)),
+    ("POST", "/api/v1/auth/", RateBudget("auth", 20, 0.5)),
+    (
+        None,
+        "/api/v1/",
+        RateBudget("default", RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND),
+    ),
+]
+
+rate_limiter = TokenBucketLimiter()
+
+PROFILE_HEADER_KEY = PROFILE_HEADER.lower().encode()
+PROFILE_URL = "/api/v1/admin/profiles/{}"
+
+# Route templates by endpoint, filled from the app's routes on first use.
+route_templates: Dict[Callable[..., Any], str] = {}
+
+
+def request_size_limit(path: str) -> int:
+    return REQUEST_SIZE_LIMITS.get(path, MAX_REQUEST_SIZE)
+
+
+def size_limit_detail(limit: int) -> str:
+    return f"Request body exceeds {limit // (1024 * 1024)}MB limit"
+
+
+def rate_budget(method: str, path: str) -> RateBudget | None:
+    for budget_method, prefix, budget in RATE_LIMIT_BUDGETS:
+        if (budget_method is None or budget_method == method) and path.startswith(
+            prefix
+        ):
+            return budget
+    return None
+
+
+def route_template(scope: Scope) -> str:
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in route_templates:
+        route_templates.update(
+            (route.endpoint, route.path)
+            for route in scope["app"].routes
+            if getattr(route, "endpoint", None) is not None
+        )
+    return route_templates.get(endpoint, "unmatched")
+
+
+def bearer_token(scope: Scope) -> str | None:
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+def rate_limit_headers(decision: RateDecision) -> Dict[str, str]:
+    budget = decision.budget
+    return {
+        "RateLimit-Limit": str(budget.burst),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(math.ceil(decision.reset_after)),
+        "RateLimit-Policy": f"{budget.burst};w={math.ceil(budget.window_seconds)}",
+    }
+
+
+# The middlewares are plain ASGI callables: BaseHTTPMiddleware runs each
+# request in an extra task and re-wraps the body streams in both directions.
+class CorrelationIdMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = Headers(scope=scope).get("X-Correlation-ID", str(uuid.uuid4()))
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        response_started = False
+
+        async def send_with_correlation_id(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                MutableHeaders(scope=message)["X-Correlation-ID"] = correlation_id
+            await send(message)
 
         try:
-            response: Response = await call_next(request)
+            await self.app(scope, receive, send_with_correlation_id)
         except Exception:
-            return problem(
+            if response_started:
+                raise
+            response = problem(
                 status=500,
                 title="Internal Server Error",
                 detail="An unexpected error occurred.",
                 extras={"correlation_id": correlation_id},
             )
+            await response(scope, receive, send_with_correlation_id)
 
-        response.headers["X-Correlation-ID"] = correlation_id
 
-        return response
+class RequestSizeLimitMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        content_length = request.headers.get("content-length")
-        if content_length and int(content_length) > MAX_REQUEST_SIZE:
-            return problem(
+        limit = request_size_limit(scope["path"])
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and int(content_length) > limit:
+            response = problem(
                 status=413,
                 title="Payload Too Large",
-                detail="Request body exceeds 2MB limit",
+                detail=size_limit_detail(limit),
                 type_="https://example.com/docs/errors/request-too-large",
             )
-        return await call_next(request)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        # Chunked bodies carry no Content-Length, so the budget is also
+        # enforced on the bytes the application actually reads.
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise PayloadTooLargeError(size_limit_detail(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# Runs ahead of routing, so a rejected request never reaches token
+# verification or the database. Tokens are only hashed, not verified: an
+# unverified token gets its own bucket but still shares the address bucket.
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, limiter: TokenBucketLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    def _decide(self, scope: Scope, budget: RateBudget) -> RateDecision:
+        client = scope.get("client")
+        address = client[0] if client else "unknown"
+        decision = self.limiter.acquire(
+            f"{budget.name}:ip:{address}", budget.scaled(RATE_LIMIT_IP_FACTOR)
+        )
+        token = bearer_token(scope)
+        if not decision.allowed or token is None:
+            return decision
+
+        return self.limiter.acquire(
+            f"{budget.name}:token:{token_digest(token)}", budget
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        budget = (
+            rate_budget(scope["method"], scope["path"])
+            if scope["type"] == "http" and RATE_LIMIT_ENABLED
+            else None
+        )
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = self._decide(scope, budget)
+        headers = rate_limit_headers(decision)
+        if not decision.allowed:
+            response = problem(
+                status=429,
+                title="Too Many Requests",
+                detail=f"Rate limit exceeded for {budget.name} requests",
+                type_="https://example.com/docs/errors/rate-limited",
+                request=Request(scope),
+            )
+            response.headers.update(headers)
+            response.headers["Retry-After"] = str(math.ceil(decision.retry_after))
+            await response(scope, receive, send)
+            return
+
+        async def send_with_rate_limit(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_rate_limit)
+
+
+# Outermost, so the recorded latency covers the other middlewares. Routes
+# are labelled by template to keep the number of series bounded.
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                route_template(scope),
+                str(status),
+            )
+
+
+# Requests without the profile header only pay for one scan of the raw
+# headers. Profiled requests are run under the stack sampler and answered
+# with a link to the artifact, named after the request's correlation id.
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(
+            name == PROFILE_HEADER_KEY for name, _ in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        token = bearer_token(scope)
+        if token is None or not await run_in_threadpool(is_admin_token, token):
+            response = problem(
+                status=403,
+                title="Forbidden",
+                detail="Profiling requires an admin token",
+                request=request,
+            )
+            await response(scope, receive, send)
+            return
+
+        correlation_id = scope.get("state", {}).get("correlation_id", "")
+        path = profile_path(correlation_id)
+        if path is None:
+            response = problem(
+                status=400,
+                title="Bad Request",
+                detail="X-Correlation-ID cannot be used as a profile key",
+                request=request,
+            )
+            await response(scope, receive, send)
+            return
+
+        if not profile_lock.acquire(blocking=False):
+            response = problem(
+                status=503,
+                title="Service Unavailable",
+                detail="Another request is being profiled",
+                request=request,
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers[PROFILE_HEADER] = PROFILE_URL.format(correlation_id)
+            await send(message)
+
+        sampler = StackSampler()
+        try:
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_with_profile)
+            finally:
+                stacks = sampler.stop()
+            await run_in_threadpool(save_profile, path, stacks)
+        finally:
+            profile_lock.release()
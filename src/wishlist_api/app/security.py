@@ -1,17 +1,31 @@
 import os
+import time
 from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple
 
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import event
 from sqlmodel import Session
-
-from src.wishlist_api.adapters.database import get_session
-from src.wishlist_api.domain.models import User
-from src.wishlist_api.shared.errors import AuthenticationError, NotFoundError
-
-from .utils.token_utils import is_token_revoked, revoke_token
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.wishlist_api.adapters import database
+from src.wishlist_api.adapters.database import get_async_session, get_session
+from src.wishlist_api.domain.models import User, UserRole
+from src.wishlist_api.shared.errors import AppError, AuthenticationError, NotFoundError
+
+from .utils.cache import LRUCache
+from .utils.executors import BoundedExecutor
+from .utils.keyring import load_key_ring
+from .utils.metrics import password_hash_duration
+from .utils.token_utils import (
+    is_token_revoked,
+    is_token_revoked_async,
+    revoke_token,
+    token_digest,
+)
 
 USE_ENV_SECRETS = os.getenv("USE_ENV_SECRETS", "true").lower() == "true"
 if not USE_ENV_SECRETS:
@@ -26,6 +40,12 @@ JWT_ROTATE_KEY = os.getenv("JWT_ROTATE_KEY", "false").lower() == "true"
 JWT_SECRET_CURRENT = os.getenv("JWT_SECRET_CURRENT", "wishlist-current")
 JWT_SECRET_PREVIOUS = os.getenv("JWT_SECRET_PREVIOUS", "wishlist-previous")
 
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 32))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+
 pwd_context = CryptContext(
     schemes=["argon2"],
     deprecated="auto",
@@ -35,13 +55,37 @@ pwd_context = CryptContext(
 )
 bearer_scheme = HTTPBearer()
 
+key_ring = load_key_ring(
+    JWT_SECRET_CURRENT, JWT_SECRET_PREVIOUS if JWT_ROTATE_KEY else None
+)
+
+# argon2-cffi releases the GIL while hashing, so a dedicated thread pool gives
+# real parallelism without tying up the shared anyio threadpool.
+hashing_executor = BoundedExecutor(HASH_WORKERS, HASH_QUEUE_SIZE, "argon2")
+
+# Verified payloads keyed by token digest; each entry lives until the token's exp.
+token_cache: LRUCache[str, Tuple[str, Dict[str, Any]]] = LRUCache(TOKEN_CACHE_SIZE)
+
+# Column values of recently authenticated users; requests get a detached copy.
+user_cache: LRUCache[int, Dict[str, Any]] = LRUCache(USER_CACHE_SIZE)
+
 
 def get_password_hash(password: str) -> str:
-    return str(pwd_context.hash(password))
+    with password_hash_duration.time("hash"):
+        return str(pwd_context.hash(password))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bool(pwd_context.verify(plain_password, hashed_password))
+    with password_hash_duration.time("verify"):
+        return bool(pwd_context.verify(plain_password, hashed_password))
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_executor.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_executor.run(verify_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -50,46 +94,147 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, JWT_SECRET_CURRENT, algorithm=ALGORITHM)
+    kid, secret = key_ring.signing_key()
+    token = jwt.encode(to_encode, secret, algorithm=ALGORITHM, headers={"kid": kid})
     return str(token)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),  # noqa: B008
-    session: Session = Depends(get_session),  # noqa: B008
-) -> User:
-    token = credentials.credentials
+def decode_access_token(token: str) -> Tuple[str, Dict[str, Any]]:
     try:
-        payload = jwt.decode(token, JWT_SECRET_CURRENT, algorithms=[ALGORITHM])
-    except JWTError:
-        if JWT_ROTATE_KEY:
-            try:
-                payload = jwt.decode(token, JWT_SECRET_PREVIOUS, algorithms=[ALGORITHM])
-            except JWTError:
-                raise AuthenticationError("Invalid or malformed token")
-        else:
+        kid = jwt.get_unverified_header(token).get("kid") or key_ring.active_kid
+        secret = key_ring.get(kid) if isinstance(kid, str) else None
+        if secret is None:
             raise AuthenticationError("Invalid or malformed token")
+        payload = jwt.decode(token, secret, algorithms=[ALGORITHM])
+    except JWTError:
+        raise AuthenticationError("Invalid or malformed token")
+    return kid, dict(payload)
+
+
+def verify_access_token(token: str) -> Dict[str, Any]:
+    digest = token_digest(token)
+    cached = token_cache.get(digest)
+    if cached is not None and key_ring.get(cached[0]) is not None:
+        return cached[1]
 
-    user_id: str = payload.get("sub")
+    kid, payload = decode_access_token(token)
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(digest, (kid, payload), expires_at=float(exp))
+    return payload
+
+
+def token_subject(payload: Dict[str, Any]) -> int:
+    user_id: str | None = payload.get("sub")
     if user_id is None:
         raise AuthenticationError("Invalid token: no subject field")
+    return int(user_id)
+
+
+def user_for_token(session: Session, token: str) -> User:
+    user_id = token_subject(verify_access_token(token))
 
     if is_token_revoked(session, token):
         raise AuthenticationError("Token has been revoked")
 
-    user = session.get(User, int(user_id))
+    user = load_user(session, user_id)
     if not user:
         raise NotFoundError("User not found")
 
     return user
 
 
-def logout_user(token: str, session: Session) -> None:
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),  # noqa: B008
+    session: Session = Depends(get_session),  # noqa: B008
+) -> User:
+    return user_for_token(session, credentials.credentials)
+
+
+# For checks made outside of a route, where no request session exists.
+def is_admin_token(token: str) -> bool:
     try:
-        payload = jwt.decode(token, JWT_SECRET_CURRENT, algorithms=[ALGORITHM])
-        exp = datetime.utcfromtimestamp(
-            payload.get("exp", datetime.utcnow().timestamp())
+        with Session(database.engine) as session:
+            return user_for_token(session, token).role == UserRole.admin
+    except AppError:
+        return False
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),  # noqa: B008
+    session: AsyncSession = Depends(get_async_session),  # noqa: B008
+) -> User:
+    token = credentials.credentials
+    user_id = token_subject(verify_access_token(token))
+
+    if await is_token_revoked_async(session, token):
+        raise AuthenticationError("Token has been revoked")
+
+    user = await load_user_async(session, user_id)
+    if not user:
+        raise NotFoundError("User not found")
+
+    return user
+
+
+def cache_user(user: User) -> None:
+    if user.id is not None:
+        user_cache.set(
+            user.id,
+            user.model_dump(),
+            expires_at=time.time() + USER_CACHE_TTL_SECONDS,
         )
+
+
+def load_user(session: Session, user_id: int) -> User | None:
+    fields = user_cache.get(user_id)
+    if fields is not None:
+        return User(**fields)
+
+    user = session.get(User, user_id)
+    if user is not None:
+        cache_user(user)
+    return user
+
+
+async def load_user_async(session: AsyncSession, user_id: int) -> User | None:
+    fields = user_cache.get(user_id)
+    if fields is not None:
+        return User(**fields)
+
+    user = await session.get(User, user_id)
+    if user is not None:
+        cache_user(user)
+    return user
+
+
+def invalidate_user(user_id: int | None) -> None:
+    if user_id is not None:
+        user_cache.pop(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_change(mapper: Any, connection: Any, target: User) -> None:
+    invalidate_user(target.id)
+
+
+def token_revocation_expiry(token: str) -> datetime | None:
+    token_cache.pop(token_digest(token))
+    try:
+        _, payload = decode_access_token(token)
+    except AuthenticationError:
+        return None
+    return datetime.utcfromtimestamp(payload.get("exp", datetime.utcnow().timestamp()))
+
+
+def logout_user(token: str, session: Session) -> None:
+    exp = token_revocation_expiry(token)
+    if exp is not None:
         revoke_token(session, token, exp)
-    except JWTError:
-        pass
+
+
+async def logout_user_async(token: str, session: AsyncSession) -> None:
+    exp = token_revocation_expiry(token)
+    if exp is not None:
+        await session.run_sync(revoke_token, token, exp)  # type: ignore[arg-type]
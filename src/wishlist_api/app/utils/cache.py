@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[K, Tuple[V, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, expires_at: float = float("inf")) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+G = TypeVar("G", bound=Hashable)
+
+
+# Entries are grouped (e.g. per owner) so that a write drops the whole group at
+# once. Readers take the group before querying and store into that object; if a
+# write invalidates it meanwhile, the late entry lands in a detached group.
+class GroupedLRUCache(Generic[G, K, V]):
+    def __init__(self, max_groups: int, max_entries_per_group: int) -> None:
+        self.max_entries_per_group = max_entries_per_group
+        self.hits = 0
+        self.misses = 0
+        self._groups: LRUCache[G, LRUCache[K, V]] = LRUCache(max_groups)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def group(self, group_key: G) -> LRUCache[K, V]:
+        with self._lock:
+            entries = self._groups.get(group_key)
+            if entries is None:
+                entries = LRUCache(self.max_entries_per_group)
+                self._groups.set(group_key, entries)
+            return entries
+
+    def get(self, entries: LRUCache[K, V], key: K) -> V | None:
+        value = entries.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def invalidate(self, group_key: G) -> None:
+        self._groups.pop(group_key)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "groups": len(self)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._groups.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,39 @@
+import hashlib
+from typing import Iterable, Tuple
+
+from starlette.responses import Response
+
+
+def resource_etag(resource_id: int | None, version: int) -> str:
+    return f'"{resource_id}-{version}"'
+
+
+# A page's tag depends only on which rows it holds and their versions, so it
+# can be computed from (id, version) pairs without loading the rows.
+def collection_etag(versions: Iterable[Tuple[int | None, int]]) -> str:
+    digest = hashlib.sha256()
+    for resource_id, version in versions:
+        digest.update(f"{resource_id}:{version};".encode())
+    return f'"l-{digest.hexdigest()[:32]}"'
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: str | None, etag: str) -> bool:
+    if header is None:
+        return False
+    tags = _tags(header)
+    return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+
+def if_match(header: str | None, etag: str) -> bool:
+    if header is None:
+        return True
+    tags = _tags(header)
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
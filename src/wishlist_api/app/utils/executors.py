@@ -0,0 +1,44 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from src.wishlist_api.shared.errors import ServiceUnavailableError
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int, max_queue: int, name: str) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def busy(self) -> int:
+        return self._busy
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._busy >= self.max_workers + self.max_queue:
+                return False
+            self._busy += 1
+            return True
+
+    def _release(self, _: Future | None = None) -> None:
+        with self._lock:
+            self._busy -= 1
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if not self._acquire():
+            raise ServiceUnavailableError("Server is busy, try again later")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
@@ -0,0 +1,158 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.wishlist_api.shared.errors import problem
+
+from .etags import none_match, not_modified
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 64 * 1024))
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class FileSliceResponse(Response):
+    def __init__(
+        self,
+        path: Path,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: Dict[str, str] | None = None,
+        media_type: str | None = None,
+    ) -> None:
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with await anyio.open_file(self.path, "rb") as file:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if scope["method"] == "HEAD" or self.length == 0:
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            # Servers implementing the ASGI zero-copy extension take the open
+            # file and call sendfile(); otherwise read in chunks off the loop.
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file.wrapped,
+                        "offset": self.offset,
+                        "count": self.length,
+                    }
+                )
+                return
+
+            await file.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": remaining > 0,
+                    }
+                )
+
+
+# Only single ranges are served; anything else falls back to the full body.
+def parse_range(header: str, size: int) -> Tuple[int, int] | None:
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            return (max(size - suffix, 0), size - 1) if suffix > 0 else (size, size)
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start > end and start < size:
+        return None
+    return start, end
+
+
+def modified_since(header: str | None, mtime: float) -> bool:
+    if header is None:
+        return True
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return True
+    return int(mtime) > since
+
+
+def immutable_file_response(
+    path: Path, media_type: str, etag: str, request_headers: Headers
+) -> Response:
+    stat = path.stat()
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if none_match(if_none_match, etag):
+            return not_modified_file(etag, headers)
+    elif not modified_since(request_headers.get("if-modified-since"), stat.st_mtime):
+        return not_modified_file(etag, headers)
+
+    size = stat.st_size
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header is None or (if_range is not None and if_range != etag):
+        return FileSliceResponse(path, 0, size, headers=headers, media_type=media_type)
+
+    byte_range = parse_range(range_header, size)
+    if byte_range is None:
+        return FileSliceResponse(path, 0, size, headers=headers, media_type=media_type)
+    start, end = byte_range
+    if start >= size:
+        response = problem(
+            status=416,
+            title="Range Not Satisfiable",
+            detail="Requested range is outside the file",
+        )
+        response.headers["Content-Range"] = f"bytes */{size}"
+        return response
+    return FileSliceResponse(
+        path,
+        start,
+        end - start + 1,
+        status_code=206,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+        media_type=media_type,
+    )
+
+
+def not_modified_file(etag: str, headers: Dict[str, str]) -> Response:
+    response = not_modified(etag)
+    response.headers.update(headers)
+    return response
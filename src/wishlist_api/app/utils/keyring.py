@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+logger = logging.getLogger("audit")
+
+JWT_KEYRING_FILE = os.getenv("JWT_KEYRING_FILE")
+JWT_KEYRING_SIZE = int(os.getenv("JWT_KEYRING_SIZE", 3))
+JWT_KEYRING_RELOAD_SECONDS = float(os.getenv("JWT_KEYRING_RELOAD_SECONDS", 5))
+
+
+class KeyRing:
+    def __init__(
+        self,
+        keys: Dict[str, str],
+        active_kid: str,
+        path: Path | None = None,
+        max_keys: int = JWT_KEYRING_SIZE,
+        reload_seconds: float = JWT_KEYRING_RELOAD_SECONDS,
+    ) -> None:
+        if active_kid not in keys:
+            raise RuntimeError(f"Active JWT key '{active_kid}' is not in the key ring")
+        self.path = path
+        self.max_keys = max_keys
+        self.reload_seconds = reload_seconds
+        self._seed = dict(keys)
+        self._retired: set[str] = set()
+        self._keys = dict(keys)
+        self._active_kid = active_kid
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        if path is not None and path.exists():
+            self._load()
+
+    @property
+    def active_kid(self) -> str:
+        self._maybe_reload()
+        return self._active_kid
+
+    def kids(self) -> list[str]:
+        self._maybe_reload()
+        return list(self._keys)
+
+    def signing_key(self) -> Tuple[str, str]:
+        self._maybe_reload()
+        kid = self._active_kid
+        return kid, self._keys[kid]
+
+    def get(self, kid: str) -> str | None:
+        self._maybe_reload()
+        return self._keys.get(kid)
+
+    def rotate(self, kid: str | None = None, secret: str | None = None) -> str:
+        kid = kid or f"k{int(time.time())}-{secrets.token_hex(4)}"
+        with self._lock:
+            keys = {kid: secret or secrets.token_urlsafe(48)}
+            for old_kid, old_secret in self._keys.items():
+                if len(keys) >= self.max_keys:
+                    break
+                keys.setdefault(old_kid, old_secret)
+            self._keys = self._with_seed(keys)
+            self._active_kid = kid
+            self._save()
+        return kid
+
+    def retire(self, kid: str) -> None:
+        with self._lock:
+            if kid == self._active_kid:
+                raise RuntimeError("Cannot retire the active JWT key")
+            if kid in self._seed:
+                self._retired.add(kid)
+            self._keys.pop(kid, None)
+            self._save()
+
+    def _maybe_reload(self) -> None:
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            with self._lock:
+                self._load()
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        data = json.loads(self.path.read_text())
+        keys = {str(k): str(v) for k, v in data["keys"].items()}
+        self._retired = {str(kid) for kid in data.get("retired", [])}
+        for kid, secret in keys.items():
+            if self._seed.get(kid, secret) != secret:
+                logger.warning(
+                    f"JWT key '{kid}' in {self.path} overrides its env secret"
+                )
+        keys = self._with_seed(keys)
+        if data["active"] not in keys:
+            raise RuntimeError("Active JWT key is missing from the key ring file")
+        self._keys = keys
+        self._active_kid = data["active"]
+        self._mtime = self.path.stat().st_mtime
+
+    # Keys from the environment stay valid until retired and are never written
+    # out; the file only shares runtime rotations and retirements.
+    def _with_seed(self, keys: Dict[str, str]) -> Dict[str, str]:
+        seed = {
+            k: v
+            for k, v in self._seed.items()
+            if k not in keys and k not in self._retired
+        }
+        return {**keys, **seed}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        keys = {k: v for k, v in self._keys.items() if self._seed.get(k) != v}
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".keyring-")
+        with os.fdopen(fd, "w") as f:
+            retired = sorted(self._retired)
+            json.dump({"active": self._active_kid, "keys": keys, "retired": retired}, f)
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime
+
+
+def load_key_ring(current: str, previous: str | None = None) -> KeyRing:
+    keys = {"current": current}
+    if previous is not None:
+        keys["previous"] = previous
+    path = Path(JWT_KEYRING_FILE) if JWT_KEYRING_FILE else None
+    return KeyRing(keys, "current", path=path)
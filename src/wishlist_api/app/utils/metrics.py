@@ -0,0 +1,258 @@
+import bisect
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from anyio import to_thread
+from sqlalchemy import Engine, event
+
+Labels = Tuple[str, ...]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label(value)}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+# Every thread records into its own shard, so the hot path takes no lock and
+# no two threads write the same array. Shards are only summed when scraped;
+# shards of finished threads are folded into a retired total.
+class Metric:
+    kind = "untyped"
+    width = 1
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[Labels, array]]] = []
+        self._retired: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _series(self, labels: Labels) -> array:
+        shard: Dict[Labels, array] | None = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        values = shard.get(labels)
+        if values is None:
+            values = shard[labels] = array("d", bytes(8 * self.width))
+        return values
+
+    def merged(self) -> Dict[Labels, List[float]]:
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    self._add(self._retired, shard)
+            self._shards = live
+            totals = {labels: list(values) for labels, values in self._retired.items()}
+            for _, shard in live:
+                self._add(totals, shard)
+        return totals
+
+    def _add(self, totals: Dict[Labels, List[float]], shard: Dict[Labels, Any]) -> None:
+        for labels, values in list(shard.items()):
+            total = totals.setdefault(labels, [0.0] * self.width)
+            for i, value in enumerate(values):
+                total[i] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, values in sorted(self.merged().items()):
+            series = format_labels(self.labelnames, labels)
+            yield f"{self.name}{series} {format_value(values[0])}"
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._series(labels)[0] += amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._series(labels)[0] += amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._series(labels)[0] -= amount
+
+
+# Series layout: one count per bucket, the +Inf bucket, then the sum.
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self.width = len(self.buckets) + 2
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._series(labels)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self) -> Iterator[str]:
+        names = self.labelnames + ("le",)
+        for labels, values in sorted(self.merged().items()):
+            cumulative = 0.0
+            bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                bucket_labels = format_labels(names, labels + (bound,))
+                yield f"{self.name}_bucket{bucket_labels} {format_value(cumulative)}"
+            series = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{series} {format_value(values[-1])}"
+            yield f"{self.name}_count{series} {format_value(cumulative)}"
+
+
+# Sampled at scrape time, for values that already live elsewhere.
+class CallbackGauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]) -> None:
+        super().__init__(name, help)
+        self.read = read
+
+    def samples(self) -> Iterator[str]:
+        yield f"{self.name} {format_value(self.read())}"
+
+
+class StatsCollector:
+    def __init__(self, prefix: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        self.prefix = prefix
+        self.stats = stats
+
+    def render(self) -> Iterator[str]:
+        for key, value in self.stats().items():
+            name = f"{self.prefix}_{key}"
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {format_value(float(value))}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._collectors: List[Metric | StatsCollector] = []
+
+    def register(self, collector: Any) -> Any:
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = [line for c in self._collectors for line in c.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+request_duration: Histogram = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ("method", "route", "status"),
+    )
+)
+requests_in_flight: Gauge = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being served")
+)
+query_duration: Histogram = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Database statement execution time",
+        ("operation",),
+        QUERY_BUCKETS,
+    )
+)
+password_hash_duration: Histogram = registry.register(
+    Histogram(
+        "password_hash_duration_seconds",
+        "Argon2 hashing and verification time",
+        ("operation",),
+        HASH_BUCKETS,
+    )
+)
+upload_bytes: Counter = registry.register(
+    Counter("upload_bytes_total", "Bytes received in uploaded files", ("result",))
+)
+registry.register(
+    CallbackGauge(
+        "threadpool_busy_threads",
+        "Worker threads in use by the shared anyio threadpool",
+        lambda: to_thread.current_default_thread_limiter().borrowed_tokens,
+    )
+)
+registry.register(
+    CallbackGauge(
+        "threadpool_max_threads",
+        "Size of the shared anyio threadpool",
+        lambda: to_thread.current_default_thread_limiter().total_tokens,
+    )
+)
+
+
+def query_operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in QUERY_OPERATIONS else "OTHER"
+
+
+def _query_started(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _query_finished(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        query_duration.observe(
+            time.perf_counter() - started, query_operation(statement)
+        )
+
+
+def instrument_queries(target: Any = Engine) -> None:
+    if not event.contains(target, "before_cursor_execute", _query_started):
+        event.listen(target, "before_cursor_execute", _query_started)
+        event.listen(target, "after_cursor_execute", _query_finished)
@@ -0,0 +1,21 @@
+import base64
+import json
+from typing import Any, List
+
+from src.wishlist_api.shared.errors import ValidationError
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise ValidationError("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError("Invalid pagination cursor")
+    return values
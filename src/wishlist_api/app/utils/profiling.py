@@ -0,0 +1,86 @@
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, List
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles")).resolve()
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", 1)) / 1000
+PROFILE_MAX_ARTIFACTS = int(os.getenv("PROFILE_MAX_ARTIFACTS", 50))
+PROFILE_MAX_DEPTH = 128
+
+# Client-supplied correlation ids become file names, so only plain ids qualify.
+PROFILE_KEY = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,127}")
+
+# One profile at a time: the sampler sees every thread in the process.
+profile_lock = threading.Lock()
+
+
+def profile_path(correlation_id: str) -> Path | None:
+    if PROFILE_KEY.fullmatch(correlation_id) is None:
+        return None
+    return PROFILE_DIR / f"{correlation_id}.folded"
+
+
+def frame_name(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def collapse_stack(thread_name: str, frame: FrameType | None) -> str:
+    names: List[str] = []
+    while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+# Samples every thread, not just the event loop, because sync endpoints and
+# hashing run in worker threads. Output is the collapsed-stack format read by
+# flamegraph.pl and speedscope. Requests served concurrently show up as well.
+class StackSampler:
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != self._thread.ident:
+                self.stacks[collapse_stack(names.get(ident, str(ident)), frame)] += 1
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        self.sample()
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stopped.set()
+        self._thread.join()
+        return dict(self.stacks)
+
+
+def save_profile(path: Path, stacks: Dict[str, int]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    with os.fdopen(fd, "w") as out:
+        out.write(lines)
+    os.replace(tmp_name, path)
+
+    profiles = sorted(path.parent.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+    for old in profiles[:-PROFILE_MAX_ARTIFACTS]:
+        old.unlink(missing_ok=True)
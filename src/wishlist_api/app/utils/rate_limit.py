@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Field, Session, SQLModel, col, select
+
+from src.wishlist_api.adapters import database
+
+from .cache import LRUCache
+
+LOGIN_LIMIT_STORE = os.getenv("LOGIN_LIMIT_STORE", "database")
+LOGIN_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_LIMIT_MAX_KEYS", 100_000))
+LOGIN_LIMIT_BUCKETS = int(os.getenv("LOGIN_LIMIT_BUCKETS", 15))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000))
+
+
+class LoginAttempt(SQLModel, table=True):
+    key: str = Field(primary_key=True, max_length=64)
+    bucket: int = Field(primary_key=True, index=True)
+    count: int = 0
+
+
+class AttemptStore(ABC):
+    @abstractmethod
+    def add(self, key: str, bucket: int, oldest: int) -> None: ...
+
+    @abstractmethod
+    def count(self, key: str, oldest: int) -> int: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+# Each key holds a fixed ring of (bucket id, count) slots, so its footprint does
+# not depend on the number of attempts. Keys beyond max_keys are evicted LRU.
+class MemoryAttemptStore(AttemptStore):
+    def __init__(self, buckets: int, max_keys: int, bucket_seconds: float) -> None:
+        self.buckets = buckets
+        self.bucket_seconds = bucket_seconds
+        self._rings: LRUCache[str, array] = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def add(self, key: str, bucket: int, oldest: int) -> None:
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = array("q", [-1] * self.buckets + [0] * self.buckets)
+            slot = bucket % self.buckets
+            if ring[slot] != bucket:
+                ring[slot] = bucket
+                ring[self.buckets + slot] = 0
+            ring[self.buckets + slot] += 1
+            expires_at = (bucket + self.buckets) * self.bucket_seconds
+            self._rings.set(key, ring, expires_at=expires_at)
+
+    def count(self, key: str, oldest: int) -> int:
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                return 0
+            return sum(
+                ring[self.buckets + slot]
+                for slot in range(self.buckets)
+                if ring[slot] >= oldest
+            )
+
+    def clear(self) -> None:
+        self._rings.clear()
+
+
+# Backed by the application database so every worker sees the same counts.
+class DatabaseAttemptStore(AttemptStore):
+    def add(self, key: str, bucket: int, oldest: int) -> None:
+        statement = insert(LoginAttempt).values(key=key, bucket=bucket, count=1)
+        with Session(database.engine) as session:
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["key", "bucket"],
+                    set_={"count": LoginAttempt.count + 1},
+                )
+            )
+            session.execute(
+                delete(LoginAttempt).where(col(LoginAttempt.bucket) < oldest)
+            )
+            session.commit()
+
+    def count(self, key: str, oldest: int) -> int:
+        with Session(database.engine) as session:
+            total = session.exec(
+                select(func.coalesce(func.sum(LoginAttempt.count), 0)).where(
+                    LoginAttempt.key == key, col(LoginAttempt.bucket) >= oldest
+                )
+            ).one()
+        return int(total)
+
+    def clear(self) -> None:
+        with Session(database.engine) as session:
+            session.execute(delete(LoginAttempt))
+            session.commit()
+
+
+# Counts events over the last `buckets` fixed-width buckets, an approximation
+# of a sliding window at bucket granularity.
+class SlidingWindowLimiter:
+    def __init__(
+        self, store: AttemptStore, limit: int, window_seconds: float, buckets: int
+    ) -> None:
+        self.store = store
+        self.limit = limit
+        self.buckets = buckets
+        self.bucket_seconds = window_seconds / buckets
+
+    def _window(self, now: float | None) -> tuple[int, int]:
+        bucket = int((now if now is not None else time.time()) // self.bucket_seconds)
+        return bucket, bucket - self.buckets + 1
+
+    def hit(self, key: str, now: float | None = None) -> None:
+        bucket, oldest = self._window(now)
+        self.store.add(key, bucket, oldest)
+
+    def is_limited(self, key: str, now: float | None = None) -> bool:
+        _, oldest = self._window(now)
+        return self.store.count(key, oldest) >= self.limit
+
+
+def make_attempt_store(
+    kind: str, window_seconds: float, buckets: int = LOGIN_LIMIT_BUCKETS
+) -> AttemptStore:
+    if kind == "memory":
+        return MemoryAttemptStore(
+            buckets, LOGIN_LIMIT_MAX_KEYS, window_seconds / buckets
+        )
+    if kind == "database":
+        return DatabaseAttemptStore()
+    raise RuntimeError(f"Unknown login limit store '{kind}'")
+
+
+class RateBudget:
+    def __init__(self, name: str, burst: int, per_second: float) -> None:
+        self.name = name
+        self.burst = burst
+        self.per_second = per_second
+
+    @property
+    def window_seconds(self) -> float:
+        return self.burst / self.per_second
+
+    def scaled(self, factor: int) -> "RateBudget":
+        return RateBudget(self.name, self.burst * factor, self.per_second * factor)
+
+
+class RateDecision:
+    def __init__(
+        self, budget: RateBudget, allowed: bool, remaining: int, retry_after: float
+    ) -> None:
+        self.budget = budget
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+    @property
+    def reset_after(self) -> float:
+        return (self.budget.burst - self.remaining) / self.budget.per_second
+
+
+# Token buckets stored as [tokens, updated_at]. A bucket that would have
+# refilled completely expires from the LRU, so idle keys cost nothing.
+class TokenBucketLimiter:
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS) -> None:
+        self._buckets: LRUCache[str, array] = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(
+        self, key: str, budget: RateBudget, now: float | None = None
+    ) -> RateDecision:
+        now = now if now is not None else time.time()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = array("d", [budget.burst, now])
+            tokens = min(
+                budget.burst, bucket[0] + (now - bucket[1]) * budget.per_second
+            )
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            bucket[0], bucket[1] = tokens, now
+            full_at = now + (budget.burst - tokens) / budget.per_second
+            self._buckets.set(key, bucket, expires_at=full_at)
+
+        retry_after = 0.0 if allowed else (1 - tokens) / budget.per_second
+        return RateDecision(budget, allowed, int(tokens), retry_after)
+
+    def clear(self) -> None:
+        self._buckets.clear()
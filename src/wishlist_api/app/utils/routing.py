@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+
+
+def overlay_routes(base: APIRouter, overrides: APIRouter) -> APIRouter:
+    replacements = {
+        (route.path, method): route
+        for route in overrides.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    router = APIRouter()
+    for route in base.routes:
+        if isinstance(route, APIRoute):
+            key = (route.path, next(iter(route.methods)))
+            route = replacements.get(key, route)
+        router.routes.append(route)
+    return router
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from anyio import to_thread
+from sqlmodel import Session
+
+from src.wishlist_api.adapters import database
+
+from .periodic import PeriodicTask, logger
+from .token_utils import TOKEN_SWEEP_BATCH_SIZE, purge_expired_tokens
+
+TOKEN_SWEEP_INTERVAL_SECONDS = float(os.getenv("TOKEN_SWEEP_INTERVAL_SECONDS", 300))
+
+
+class TokenSweeper(PeriodicTask):
+    name = "Token sweep"
+
+    def __init__(
+        self,
+        interval: float = TOKEN_SWEEP_INTERVAL_SECONDS,
+        batch_size: int = TOKEN_SWEEP_BATCH_SIZE,
+    ) -> None:
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.runs = 0
+        self.last_purged = 0
+        self.total_purged = 0
+        self.last_duration_ms = 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "runs": self.runs,
+            "last_purged": self.last_purged,
+            "total_purged": self.total_purged,
+            "last_duration_ms": self.last_duration_ms,
+        }
+
+    def _purge_batch(self, now: datetime) -> int:
+        with Session(database.engine) as session:
+            return purge_expired_tokens(session, self.batch_size, now)
+
+    async def run_once(self) -> int:
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        purged = 0
+        # One short transaction per batch; the write lock is released in between.
+        while True:
+            batch = await to_thread.run_sync(self._purge_batch, now)
+            purged += batch
+            if batch < self.batch_size:
+                break
+            await asyncio.sleep(0)
+
+        self.runs += 1
+        self.last_purged = purged
+        self.total_purged += purged
+        self.last_duration_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Token sweep purged {purged} rows in {self.last_duration_ms:.1f} ms"
+        )
+        return purged
+
+
+token_sweeper = TokenSweeper()
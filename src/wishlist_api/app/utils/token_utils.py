@@ -1,46 +1,167 @@
+import hashlib
 import os
-from datetime import datetime, timedelta
-from typing import cast
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, cast
 
+from sqlalchemy import CursorResult, delete
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Field, Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.sql.expression import ColumnElement
 
+from .keyring import KeyRing
+
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", 5))
+TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", 500))
+
 
 class RevokedToken(SQLModel, table=True):
+    __table_args__ = {"sqlite_autoincrement": True}
+
     id: int | None = Field(default=None, primary_key=True)
-    token: str
+    token_hash: str = Field(index=True, unique=True, max_length=64)
     revoked_at: datetime = Field(default_factory=datetime.utcnow)
-    expires_at: datetime | None = None
+    expires_at: datetime | None = Field(default=None, index=True)
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _expiry_ts(expires_at: datetime | None) -> float:
+    if expires_at is None:
+        return float("inf")
+    return expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+# Revocations from this worker are visible immediately, revocations from other
+# workers are picked up by an incremental sync (id > last seen) every interval.
+class RevocationCache:
+    def __init__(self, sync_interval: float = REVOCATION_SYNC_SECONDS) -> None:
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._synced_at: float | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def add(self, digest: str, expires_at: datetime | None) -> None:
+        with self._lock:
+            self._revoked[digest] = _expiry_ts(expires_at)
+
+    def contains(self, digest: str) -> bool:
+        return digest in self._revoked
+
+    def is_fresh(self) -> bool:
+        synced_at = self._synced_at
+        return (
+            synced_at is not None and time.monotonic() - synced_at < self.sync_interval
+        )
+
+    def sync(self, session: Session) -> None:
+        rows = session.exec(
+            select(
+                RevokedToken.id, RevokedToken.token_hash, RevokedToken.expires_at
+            ).where(cast(ColumnElement, RevokedToken.id) > self._last_id)
+        ).all()
+        now = time.time()
+        with self._lock:
+            for row_id, digest, expires_at in rows:
+                self._revoked[digest] = _expiry_ts(expires_at)
+                if row_id is not None and row_id > self._last_id:
+                    self._last_id = row_id
+            for digest in [d for d, exp in self._revoked.items() if exp < now]:
+                del self._revoked[digest]
+            self._synced_at = time.monotonic()
+
+    def load(self, session: Session) -> None:
+        self.clear()
+        self.sync(session)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._last_id = 0
+            self._synced_at = None
+
+
+revocation_cache = RevocationCache()
 
 
 def revoke_token(session: Session, token: str, exp: datetime | None = None) -> None:
-    revoked = RevokedToken(token=token, expires_at=exp)
-    session.add(revoked)
-    session.commit()
+    digest = token_digest(token)
+    session.add(RevokedToken(token_hash=digest, expires_at=exp))
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+    revocation_cache.add(digest, exp)
 
 
 def is_token_revoked(session: Session, token: str) -> bool:
-    return (
-        session.exec(select(RevokedToken).where(RevokedToken.token == token)).first()
-        is not None
+    digest = token_digest(token)
+    if revocation_cache.contains(digest):
+        return True
+    if revocation_cache.is_fresh():
+        return False
+    revocation_cache.sync(session)
+    return revocation_cache.contains(digest)
+
+
+def purge_expired_tokens(
+    session: Session,
+    batch_size: int = TOKEN_SWEEP_BATCH_SIZE,
+    now: datetime | None = None,
+) -> int:
+    expired_ids = (
+        select(RevokedToken.id)
+        .where(
+            cast(ColumnElement, RevokedToken.expires_at) < (now or datetime.utcnow())
+        )
+        .limit(batch_size)
+    )
+    result = cast(
+        CursorResult,
+        session.execute(
+            delete(RevokedToken).where(
+                cast(ColumnElement, RevokedToken.id).in_(expired_ids.scalar_subquery())
+            )
+        ),
     )
+    session.commit()
+    return int(result.rowcount or 0)
 
 
-def cleanup_expired_tokens(session: Session) -> None:
+async def is_token_revoked_async(session: AsyncSession, token: str) -> bool:
+    digest = token_digest(token)
+    if revocation_cache.contains(digest):
+        return True
+    if revocation_cache.is_fresh():
+        return False
+    await session.run_sync(revocation_cache.sync)  # type: ignore[arg-type]
+    return revocation_cache.contains(digest)
+
+
+def cleanup_expired_tokens(
+    session: Session, batch_size: int = TOKEN_SWEEP_BATCH_SIZE
+) -> int:
     now = datetime.utcnow()
-    expired_tokens = session.exec(
-        select(RevokedToken).where(cast(ColumnElement, RevokedToken.expires_at) < now)
-    ).all()
-    for token in expired_tokens:
-        session.delete(token)
-    if expired_tokens:
-        session.commit()
+    total = 0
+    while True:
+        purged = purge_expired_tokens(session, batch_size, now)
+        total += purged
+        if purged < batch_size:
+            return total
 
 
-def rotate_secret_if_needed() -> None:
+def rotate_secret_if_needed(key_ring: KeyRing) -> str | None:
     if os.getenv("JWT_ROTATE_KEY", "false").lower() == "true":
-        new_key = f"{os.urandom(32).hex()}-{datetime.utcnow().timestamp()}"
-        os.environ["SECRET_KEY"] = new_key
+        return key_ring.rotate()
+    return None
 
 
 def get_token_expiration(minutes: int = 60) -> datetime:
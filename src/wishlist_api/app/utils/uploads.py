@@ -0,0 +1,303 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Collection, Dict
+
+from anyio import to_thread
+from sqlalchemy import ColumnElement, Engine, delete, func, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+
+from src.wishlist_api.adapters import database
+from src.wishlist_api.adapters.migrations import immediate_transaction
+from src.wishlist_api.domain.models import UploadBlob, UploadRef
+from src.wishlist_api.shared.errors import (
+    PayloadTooLargeError,
+    UnsupportedMediaTypeError,
+)
+
+from .metrics import upload_bytes
+from .periodic import PeriodicTask, logger
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads")).resolve()
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 64 * 1024))
+UPLOAD_GC_INTERVAL_SECONDS = float(os.getenv("UPLOAD_GC_INTERVAL_SECONDS", 3600))
+UPLOAD_GC_BATCH_SIZE = int(os.getenv("UPLOAD_GC_BATCH_SIZE", 500))
+UPLOAD_PART_MAX_AGE_SECONDS = 3600
+UPLOAD_ORPHAN_MIN_AGE_SECONDS = 3600
+BLOB_FILENAME = re.compile(r"([0-9a-f]{64})\.(?:png|jpg)")
+
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+}
+EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg"}
+
+
+def sniff_image(head: bytes) -> str | None:
+    for signature, mime in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return mime
+    return None
+
+
+def blob_filename(sha256: str, mime: str) -> str:
+    return f"{sha256}.{EXTENSIONS[mime]}"
+
+
+class StoredUpload:
+    def __init__(self, ref: UploadRef, blob: UploadBlob, deduplicated: bool) -> None:
+        self.ref = ref
+        self.blob = blob
+        self.deduplicated = deduplicated
+
+    @property
+    def filename(self) -> str:
+        return blob_filename(self.blob.sha256, self.blob.mime)
+
+
+# Single pass over the spooled upload: the type is decided from the first
+# chunk and the size limit is checked as bytes are hashed.
+def inspect_upload(
+    source: BinaryIO,
+    max_size: int,
+    allowed_mime: Collection[str],
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> UploadBlob:
+    chunk = source.read(chunk_size)
+    mime = sniff_image(chunk)
+    if mime is None or mime not in allowed_mime:
+        raise UnsupportedMediaTypeError("File content does not match allowed formats")
+
+    digest = hashlib.sha256()
+    size = 0
+    while chunk:
+        size += len(chunk)
+        if size > max_size:
+            raise PayloadTooLargeError("File exceeds allowed limit")
+        digest.update(chunk)
+        chunk = source.read(chunk_size)
+    return UploadBlob(sha256=digest.hexdigest(), mime=mime, size=size)
+
+
+# The blob only appears under its final name once written and synced. Blobs
+# are content-addressed, so replacing a concurrent copy is harmless.
+def write_blob(
+    source: BinaryIO, path: Path, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> None:
+    source.seek(0)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".upload-", suffix=".part")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(chunk_size):
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+# A single upsert, so concurrent uploads of the same new content cannot both
+# try to insert the row. Returns the blob's reference count afterwards.
+def add_blob_ref(session: Session, blob: UploadBlob) -> int:
+    statement = insert(UploadBlob).values(
+        sha256=blob.sha256,
+        mime=blob.mime,
+        size=blob.size,
+        ref_count=1,
+        created_at=blob.created_at,
+    )
+    ref_count = session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["sha256"],
+            set_={"ref_count": col(UploadBlob.ref_count) + 1},
+        ).returning(col(UploadBlob.ref_count))
+    ).scalar_one()
+    return int(ref_count)
+
+
+def save_upload(
+    session: Session,
+    source: BinaryIO,
+    directory: Path,
+    owner_id: int,
+    wish_id: int | None,
+    max_size: int,
+    allowed_mime: Collection[str],
+) -> StoredUpload:
+    blob = inspect_upload(source, max_size, allowed_mime)
+    path = directory / blob_filename(blob.sha256, blob.mime)
+
+    # New content is written before taking the write lock; a known digest
+    # costs only the hash above and the two statements below.
+    known = session.exec(
+        select(UploadBlob.sha256).where(UploadBlob.sha256 == blob.sha256)
+    ).first()
+    if known is None:
+        write_blob(source, path)
+    blob.ref_count = add_blob_ref(session, blob)
+    deduplicated = blob.ref_count > 1
+    # The collector may have removed an unreferenced copy after the check.
+    if not deduplicated and not path.exists():
+        write_blob(source, path)
+
+    ref = UploadRef(sha256=blob.sha256, owner_id=owner_id, wish_id=wish_id)
+    session.add(ref)
+    session.commit()
+    upload_bytes.inc("deduplicated" if deduplicated else "stored", amount=blob.size)
+    session.refresh(ref)
+    return StoredUpload(ref, blob, deduplicated)
+
+
+def release_uploads(session: Session, condition: ColumnElement[bool]) -> int:
+    counts = session.execute(
+        select(UploadRef.sha256, func.count())
+        .where(condition)
+        .group_by(col(UploadRef.sha256))
+    ).all()
+    if not counts:
+        return 0
+
+    session.execute(delete(UploadRef).where(condition))
+    for sha256, count in counts:
+        session.execute(
+            update(UploadBlob)
+            .where(col(UploadBlob.sha256) == sha256)
+            .values(ref_count=col(UploadBlob.ref_count) - count)
+        )
+    return sum(count for _, count in counts)
+
+
+def release_wish_uploads(session: Any, wish_ids: Collection[int]) -> int:
+    return release_uploads(session, col(UploadRef.wish_id).in_(wish_ids))
+
+
+def collect_unreferenced_blobs(
+    session: Session, directory: Path, batch_size: int = UPLOAD_GC_BATCH_SIZE
+) -> int:
+    unreferenced = (
+        select(UploadBlob.sha256)
+        .where(col(UploadBlob.ref_count) <= 0)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    rows = session.execute(
+        delete(UploadBlob)
+        .where(col(UploadBlob.sha256).in_(unreferenced))
+        .where(col(UploadBlob.ref_count) <= 0)
+        .returning(col(UploadBlob.sha256), col(UploadBlob.mime))
+    ).all()
+    # Files go while the delete still holds the write lock, so an upload of the
+    # same content waits and then writes a fresh copy.
+    for sha256, mime in rows:
+        (directory / blob_filename(sha256, mime)).unlink(missing_ok=True)
+    session.commit()
+    return len(rows)
+
+
+def remove_stale_parts(directory: Path, max_age: float) -> int:
+    cutoff = time.time() - max_age
+    removed = 0
+    for part in directory.glob(".upload-*.part"):
+        try:
+            if part.stat().st_mtime < cutoff:
+                part.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+# A blob is written before its row commits, so a failed commit leaves a file
+# that no row points at. Files are only checked once they are old enough that
+# no upload can still be in flight, and under the write lock so that an upload
+# of the same content either has its row visible or rewrites the file.
+def remove_orphan_blobs(
+    engine: Engine,
+    directory: Path,
+    min_age: float = UPLOAD_ORPHAN_MIN_AGE_SECONDS,
+    batch_size: int = UPLOAD_GC_BATCH_SIZE,
+) -> int:
+    cutoff = time.time() - min_age
+    candidates: Dict[Path, str] = {}
+    for path in directory.iterdir():
+        match = BLOB_FILENAME.fullmatch(path.name)
+        try:
+            if match and path.stat().st_mtime < cutoff:
+                candidates[path] = match.group(1)
+        except FileNotFoundError:
+            continue
+
+    removed = 0
+    paths = list(candidates)
+    while paths:
+        batch, paths = paths[:batch_size], paths[batch_size:]
+        digests = {candidates[path] for path in batch}
+        with immediate_transaction(engine) as conn:
+            known = set(
+                conn.execute(
+                    select(UploadBlob.sha256).where(col(UploadBlob.sha256).in_(digests))
+                ).scalars()
+            )
+            for path in batch:
+                try:
+                    if candidates[path] in known or path.stat().st_mtime >= cutoff:
+                        continue
+                    path.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+    return removed
+
+
+class BlobCollector(PeriodicTask):
+    name = "Upload collection"
+
+    def __init__(
+        self,
+        directory: Path = UPLOAD_DIR,
+        interval: float = UPLOAD_GC_INTERVAL_SECONDS,
+        batch_size: int = UPLOAD_GC_BATCH_SIZE,
+    ) -> None:
+        super().__init__(interval)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.runs = 0
+        self.total_removed = 0
+
+    def stats(self) -> dict[str, float]:
+        return {"runs": self.runs, "total_removed": self.total_removed}
+
+    def _collect_batch(self) -> int:
+        with Session(database.engine) as session:
+            return collect_unreferenced_blobs(session, self.directory, self.batch_size)
+
+    async def run_once(self) -> int:
+        removed = 0
+        while True:
+            batch = await to_thread.run_sync(self._collect_batch)
+            removed += batch
+            if batch < self.batch_size:
+                break
+        await to_thread.run_sync(
+            remove_stale_parts, self.directory, UPLOAD_PART_MAX_AGE_SECONDS
+        )
+        removed += await to_thread.run_sync(
+            remove_orphan_blobs, database.engine, self.directory
+        )
+
+        self.runs += 1
+        self.total_removed += removed
+        logger.info(f"Upload collection removed {removed} unreferenced blobs")
+        return removed
+
+
+blob_collector = BlobCollector()
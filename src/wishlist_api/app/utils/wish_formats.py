@@ -0,0 +1,164 @@
+import codecs
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+WishFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = ("id", "title", "link", "price_estimate", "notes")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Spreadsheet apps evaluate cells starting with these as formulas. Export
+# guards such cells with a leading quote and import strips exactly one, so a
+# value that already starts with quotes before a prefix gains one more.
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+CSV_GUARD = "'"
+
+
+def export_record(row: Sequence[Any]) -> Dict[str, Any]:
+    record = dict(zip(EXPORT_FIELDS, row))
+    if isinstance(record["price_estimate"], Decimal):
+        record["price_estimate"] = float(record["price_estimate"])
+    return record
+
+
+def csv_safe(value: Any) -> Any:
+    if isinstance(value, str) and value.lstrip(CSV_GUARD).startswith(
+        CSV_FORMULA_PREFIXES
+    ):
+        return CSV_GUARD + value
+    return value
+
+
+def csv_unguard(value: str) -> str:
+    if value.startswith(CSV_GUARD) and value.lstrip(CSV_GUARD).startswith(
+        CSV_FORMULA_PREFIXES
+    ):
+        return value[1:]
+    return value
+
+
+def ndjson_chunk(rows: Iterable[Sequence[Any]]) -> str:
+    return "".join(
+        json.dumps(export_record(row), ensure_ascii=False) + "\n" for row in rows
+    )
+
+
+def csv_chunk(rows: Iterable[Sequence[Any]], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        record = export_record(row)
+        writer.writerow([csv_safe(record[field]) for field in EXPORT_FIELDS])
+    return buffer.getvalue()
+
+
+IMPORT_IGNORED_FIELDS = ("id", "owner_id")
+ParsedRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class WishRecordParser:
+    def __init__(self, fmt: WishFormat, max_record_size: int) -> None:
+        self.fmt = fmt
+        self.max_record_size = max_record_size
+        self.line = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._pending = ""
+        self._pending_line = 0
+        self._skipping = False
+        self._header: List[str] | None = None
+
+    def feed(self, chunk: bytes) -> Iterator[ParsedRecord]:
+        lines = (self._buffer + self._decoder.decode(chunk)).split("\n")
+        self._buffer = lines.pop()
+        # An oversized record is dropped up to its newline and still counts as
+        # one line, so later records keep their line numbers.
+        if self._skipping and lines:
+            lines.pop(0)
+            self.line += 1
+            self._skipping = False
+        for line in lines:
+            yield from self._line(line)
+        if self._skipping:
+            self._buffer = ""
+        elif len(self._buffer) > self.max_record_size:
+            number = self._pending_line if self._pending else self.line + 1
+            self._buffer = self._pending = ""
+            self._skipping = True
+            yield number, None, "Record exceeds size limit"
+
+    def close(self) -> Iterator[ParsedRecord]:
+        tail = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        if tail and not self._skipping:
+            yield from self._line(tail)
+        if self._pending:
+            self._pending = ""
+            yield self._pending_line, None, "Unterminated quoted field"
+
+    def _line(self, line: str) -> Iterator[ParsedRecord]:
+        self.line += 1
+        if self.fmt == "ndjson":
+            if line.strip():
+                yield self._ndjson(line)
+            return
+
+        if not self._pending:
+            self._pending_line = self.line
+        record = self._pending + line
+        # A CSV record continues onto the next line while a quote is open.
+        if record.count('"') % 2 == 1:
+            if len(record) > self.max_record_size:
+                self._pending = ""
+                yield self._pending_line, None, "Record exceeds size limit"
+            else:
+                self._pending = record + "\n"
+            return
+        self._pending = ""
+        if record.strip():
+            parsed = self._csv(record)
+            if parsed is not None:
+                yield parsed
+
+    def _ndjson(self, line: str) -> ParsedRecord:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return self.line, None, "Invalid JSON"
+        if not isinstance(record, dict):
+            return self.line, None, "Record must be a JSON object"
+        return self.line, drop_ignored(record), None
+
+    def _csv(self, record: str) -> ParsedRecord | None:
+        values = next(csv.reader(io.StringIO(record)), [])
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            return None
+        if len(values) != len(self._header):
+            return self._pending_line, None, "Column count does not match header"
+        row = {
+            name: csv_unguard(value) if value != "" else None
+            for name, value in zip(self._header, values)
+        }
+        return self._pending_line, drop_ignored(row), None
+
+
+def drop_ignored(record: Dict[str, Any]) -> Dict[str, Any]:
+    for field in IMPORT_IGNORED_FIELDS:
+        record.pop(field, None)
+    return record
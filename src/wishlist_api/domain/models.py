@@ -1,7 +1,9 @@
-from decimal import Decimal
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import Column, Index, Integer, event
 from sqlmodel import Field, SQLModel
 
 
@@ -17,10 +19,53 @@ class User(SQLModel, table=True):
     role: UserRole = Field(default=UserRole.user)
 
 
+# Bumped by the ORM on every UPDATE, which is also guarded by the loaded value.
+wish_version = Column("version", Integer, nullable=False, server_default="1")
+
+
 class Wish(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_wish_owner_id_id", "owner_id", "id"),
+        Index("ix_wish_owner_id_price_cents", "owner_id", "price_cents"),
+    )
+    __mapper_args__ = {"version_id_col": wish_version}
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     link: Optional[str] = None
     price_estimate: Optional[Decimal] = None
+    price_cents: Optional[int] = None
     notes: Optional[str] = None
     owner_id: int = Field(foreign_key="user.id")
+    version: int = Field(default=1, sa_column=wish_version)
+
+
+# One row per stored file, named by its SHA-256. ref_count mirrors the number
+# of UploadRef rows; blobs that drop to zero are removed by the collector.
+class UploadBlob(SQLModel, table=True):
+    sha256: str = Field(primary_key=True, max_length=64)
+    mime: str
+    size: int
+    ref_count: int = Field(default=0, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class UploadRef(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sha256: str = Field(foreign_key="uploadblob.sha256", index=True, max_length=64)
+    owner_id: int = Field(foreign_key="user.id", index=True)
+    wish_id: Optional[int] = Field(default=None, foreign_key="wish.id", index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+def to_minor_units(value: Decimal | float | None) -> int | None:
+    if value is None:
+        return None
+    cents = (Decimal(str(value)) * 100).to_integral_value(rounding=ROUND_HALF_UP)
+    return int(cents)
+
+
+@event.listens_for(Wish, "before_insert")
+@event.listens_for(Wish, "before_update")
+def _sync_price_cents(mapper: object, connection: object, target: Wish) -> None:
+    target.price_cents = to_minor_units(target.price_estimate)
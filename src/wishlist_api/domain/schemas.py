@@ -1,9 +1,12 @@
+import os
 import re
 from decimal import Decimal
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, HttpUrl, field_validator
 
+WISH_BATCH_MAX_OPERATIONS = int(os.getenv("WISH_BATCH_MAX_OPERATIONS", 500))
+
 
 class UserCreate(BaseModel):
     username: str = Field(..., min_length=3, max_length=100)
@@ -35,6 +38,11 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class JwtKeyRingRead(BaseModel):
+    active: str
+    kids: List[str]
+
+
 class WishBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=255)
     link: Optional[HttpUrl] = None
@@ -88,3 +96,63 @@ class WishRead(WishBase):
     class Config:
         orm_mode = True
         json_encoders = {Decimal: float}
+
+
+class WishBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: WishCreate
+
+    class Config:
+        extra = "forbid"
+
+
+class WishBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: WishUpdate
+
+    class Config:
+        extra = "forbid"
+
+
+class WishBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+    class Config:
+        extra = "forbid"
+
+
+WishBatchOperation = Annotated[
+    Union[WishBatchCreate, WishBatchUpdate, WishBatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class WishBatchRequest(BaseModel):
+    operations: List[WishBatchOperation] = Field(
+        ..., min_length=1, max_length=WISH_BATCH_MAX_OPERATIONS
+    )
+
+
+class WishBatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: int | None = None
+    detail: str | None = None
+
+
+class WishBatchResponse(BaseModel):
+    results: List[WishBatchResult]
+
+
+class WishImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class WishImportResult(BaseModel):
+    accepted: int = 0
+    rejected: int = 0
+    errors: List[WishImportError] = []
@@ -49,6 +49,27 @@ class UserAlreadyExistsError(AppError):
         super().__init__("USER_ALREADY_EXISTS", message, status.HTTP_400_BAD_REQUEST)
 
 
+class PreconditionFailedError(AppError):
+    def __init__(self, message: str = "Resource has been modified"):  # noqa: B042
+        super().__init__(
+            "PRECONDITION_FAILED", message, status.HTTP_412_PRECONDITION_FAILED
+        )
+
+
+class PayloadTooLargeError(AppError):
+    def __init__(self, message: str = "Request body is too large"):  # noqa: B042
+        super().__init__(
+            "PAYLOAD_TOO_LARGE", message, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+
+class UnsupportedMediaTypeError(AppError):
+    def __init__(self, message: str = "Unsupported media type"):  # noqa: B042
+        super().__init__(
+            "UNSUPPORTED_MEDIA_TYPE", message, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+
+
 class InternalServerError(AppError):
     def __init__(self, message: str = "Internal server error"):  # noqa: B042
         super().__init__(
@@ -56,6 +77,13 @@ class InternalServerError(AppError):
         )
 
 
+class ServiceUnavailableError(AppError):
+    def __init__(self, message: str = "Service temporarily unavailable"):  # noqa: B042
+        super().__init__(
+            "SERVICE_UNAVAILABLE", message, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
 def problem(
     status: int,
     title: str,
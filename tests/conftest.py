@@ -7,12 +7,17 @@ from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel, create_engine
 
 from src.wishlist_api.adapters import database
+from src.wishlist_api.app.api.auth import login_limiter
+from src.wishlist_api.app.api.wishes import list_cache
 from src.wishlist_api.app.main import app
+from src.wishlist_api.app.middleware import rate_limiter
 from src.wishlist_api.app.security import (
     create_access_token,
     get_current_user,
     get_password_hash,
+    user_cache,
 )
+from src.wishlist_api.app.utils.token_utils import revocation_cache
 from src.wishlist_api.domain.models import User, UserRole
 
 TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
@@ -33,6 +38,16 @@ def create_test_db():
     SQLModel.metadata.drop_all(engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    revocation_cache.clear()
+    user_cache.clear()
+    list_cache.clear()
+    login_limiter.store.clear()
+    rate_limiter.clear()
+    yield
+
+
 @pytest.fixture()
 def session():
     with Session(engine) as session:
@@ -0,0 +1,77 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.wishlist_api.adapters import database
+from src.wishlist_api.app.api import auth_async, wishes_async
+from src.wishlist_api.app.main import app
+from tests.conftest import TEST_DATABASE_URL
+
+API_PREFIX = "/api/v1/wishes/"
+
+
+@pytest.fixture()
+def async_client(session):
+    database.async_engine = create_async_engine(
+        database.async_database_url(TEST_DATABASE_URL), poolclass=NullPool
+    )
+    async_app = FastAPI(exception_handlers=app.exception_handlers)
+    async_app.include_router(auth_async.router, prefix="/api/v1")
+    async_app.include_router(wishes_async.router, prefix="/api/v1")
+    with TestClient(async_app) as c:
+        yield c
+    database.async_engine = None
+
+
+def test_async_database_url_uses_async_driver():
+    assert (
+        database.async_database_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    )
+
+
+def test_async_router_keeps_sync_only_routes():
+    paths = {(r.path, m) for r in wishes_async.router.routes for m in r.methods}
+    assert ("/wishes/upload", "POST") in paths
+    handler = next(r for r in wishes_async.router.routes if r.path == "/wishes/")
+    assert handler.endpoint is wishes_async.create_wish
+
+
+def test_async_auth_and_wish_crud(async_client):
+    r = async_client.post(
+        "/api/v1/auth/register", json={"username": "async", "password": "Password123_"}
+    )
+    assert r.status_code == 200, r.text
+    r = async_client.post(
+        "/api/v1/auth/login", json={"username": "async", "password": "Password123_"}
+    )
+    assert r.status_code == 200, r.text
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = async_client.post(
+        API_PREFIX, json={"title": "Async wish", "price_estimate": 10}, headers=headers
+    )
+    assert r.status_code == 200, r.text
+    wish_id = r.json()["id"]
+
+    r = async_client.get(API_PREFIX, params={"price_max": 20}, headers=headers)
+    assert [w["id"] for w in r.json()] == [wish_id]
+
+    r = async_client.patch(
+        f"{API_PREFIX}{wish_id}", json={"title": "Renamed"}, headers=headers
+    )
+    assert r.json()["title"] == "Renamed"
+    r = async_client.get(f"{API_PREFIX}search", params={"q": "renam"}, headers=headers)
+    assert [w["id"] for w in r.json()] == [wish_id]
+
+    assert (
+        async_client.delete(f"{API_PREFIX}{wish_id}", headers=headers).status_code
+        == 200
+    )
+    assert (
+        async_client.get(f"{API_PREFIX}{wish_id}", headers=headers).status_code == 404
+    )
+
+    assert async_client.post("/api/v1/auth/logout", headers=headers).status_code == 204
+    assert async_client.get(API_PREFIX, headers=headers).status_code == 401
@@ -1,7 +1,15 @@
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 
 from src.wishlist_api.app.main import app
+from src.wishlist_api.app.security import create_access_token
+from src.wishlist_api.app.utils.rate_limit import (
+    DatabaseAttemptStore,
+    MemoryAttemptStore,
+    SlidingWindowLimiter,
+)
 from src.wishlist_api.domain.models import User, UserRole
 
 
@@ -52,8 +60,6 @@ def test_admin_promote_user_success(client, session):
     session.add(user)
     session.commit()
 
-    from src.wishlist_api.app.security import create_access_token
-
     token = create_access_token({"sub": str(admin.id), "role": "admin"})
     headers = {"Authorization": f"Bearer {token}"}
 
@@ -130,8 +136,6 @@ def test_promote_by_non_admin(client, session):
     session.add(target)
     session.commit()
 
-    from src.wishlist_api.app.security import create_access_token
-
     token = create_access_token({"sub": str(user.id), "role": "user"})
     headers = {"Authorization": f"Bearer {token}"}
 
@@ -145,11 +149,64 @@ def test_promote_nonexistent_user(client, session):
     session.add(admin)
     session.commit()
 
-    from src.wishlist_api.app.security import create_access_token
-
     token = create_access_token({"sub": str(admin.id), "role": "admin"})
     headers = {"Authorization": f"Bearer {token}"}
 
     r = client.post("/api/v1/auth/promote/unknown_user", headers=headers)
     assert r.status_code in (401, 404)
     assert "not found" in r.text.lower()
+
+
+def test_login_blocked_after_repeated_failures(client):
+    client.post(
+        "/api/v1/auth/register",
+        json={"username": "mallory", "password": "Password123_"},
+    )
+    for _ in range(5):
+        r = client.post(
+            "/api/v1/auth/login",
+            json={"username": "mallory", "password": "WrongPass123_"},
+            params={"ip": "10.0.0.1"},
+        )
+        assert r.status_code == 401
+
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"username": "mallory", "password": "Password123_"},
+        params={"ip": "10.0.0.1"},
+    )
+    assert r.status_code == 403
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"username": "mallory", "password": "Password123_"},
+        params={"ip": "10.0.0.2"},
+    )
+    assert r.status_code == 200
+
+
+def test_memory_attempt_store_slides_and_evicts():
+
+    store = MemoryAttemptStore(buckets=3, max_keys=2, bucket_seconds=60)
+    limiter = SlidingWindowLimiter(store, limit=2, window_seconds=180, buckets=3)
+    now = time.time()
+
+    limiter.hit("a", now - 120)
+    limiter.hit("a", now)
+    assert limiter.is_limited("a", now)
+    assert not limiter.is_limited("a", now + 60)
+
+    limiter.hit("b", now)
+    limiter.hit("c", now)
+    assert len(store) == 2
+    assert store.count("a", 0) == 0
+
+
+def test_database_attempt_store_is_shared_between_limiters(session):
+    workers = [
+        SlidingWindowLimiter(DatabaseAttemptStore(), 3, 900, 15) for _ in range(2)
+    ]
+    workers[0].hit("10.0.0.9")
+    workers[1].hit("10.0.0.9")
+    assert not workers[0].is_limited("10.0.0.9")
+    workers[0].hit("10.0.0.9")
+    assert workers[1].is_limited("10.0.0.9")
@@ -0,0 +1,12 @@
+from src.wishlist_api.adapters.database import make_engine, report_engine_settings
+
+
+def test_sqlite_profile_applied_on_connect(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'tuned.sqlite'}")
+
+    settings = report_engine_settings(engine)
+
+    assert settings["journal_mode"] == "wal"
+    assert settings["synchronous"] == 1
+    assert settings["busy_timeout"] == 5000
+    assert "Pool size: 10" in settings["pool"]
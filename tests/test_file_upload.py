@@ -1,8 +1,20 @@
+import asyncio
+import hashlib
 import io
+import os
+import stat
+import time
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
 
+from src.wishlist_api.app.api.wishes import UPLOAD_DIR
 from src.wishlist_api.app.main import app
+from src.wishlist_api.app.utils import uploads as wishes_uploads
+from src.wishlist_api.app.utils.file_responses import FileSliceResponse
+from src.wishlist_api.domain.models import UploadBlob, UploadRef, Wish
+from tests.conftest import engine
 
 client = TestClient(app)
 
@@ -62,3 +74,243 @@ def test_upload_file_traversal_attempt(client_with_user):
     data = response.json()
     assert ".." not in data["filename"]
     assert data["mime"] == "image/png"
+
+
+def test_upload_is_hashed_and_stored_atomically(client_with_user):
+
+    content = b"\xff\xd8\xff\xe0" + b"1" * 200_000
+    response = client_with_user.post(
+        "/api/v1/wishes/upload",
+        files={"file": ("photo.jpg", io.BytesIO(content), "image/jpeg")},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["mime"] == "image/jpeg"
+    assert data["size"] == len(content)
+    assert data["sha256"] == hashlib.sha256(content).hexdigest()
+    assert (UPLOAD_DIR / data["filename"]).read_bytes() == content
+    assert not list(UPLOAD_DIR.glob(".upload-*"))
+
+
+def test_upload_aborts_when_limit_crossed_mid_stream(client_with_user, mocker):
+    mocker.patch("src.wishlist_api.app.api.wishes.MAX_FILE_SIZE", 100_000)
+    before = set(UPLOAD_DIR.iterdir())
+    response = client_with_user.post(
+        "/api/v1/wishes/upload",
+        files={"file": ("big.png", io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"0" * 200_000))},
+    )
+    assert response.status_code == 413
+    assert set(UPLOAD_DIR.iterdir()) == before
+
+
+def test_duplicate_uploads_share_one_blob(client_with_user, session, mocker):
+    write_blob = mocker.spy(wishes_uploads, "write_blob")
+    content = b"\x89PNG\r\n\x1a\n" + b"dedup" * 1000
+
+    first = upload(client_with_user, content)
+    second = upload(client_with_user, content)
+
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True
+    assert first["filename"] == second["filename"] == f"{first['sha256']}.png"
+    assert first["id"] != second["id"]
+    assert write_blob.call_count == 1
+    assert (UPLOAD_DIR / first["filename"]).read_bytes() == content
+    assert session.get(UploadBlob, first["sha256"]).ref_count == 2
+
+
+def test_concurrent_upload_of_new_content_shares_the_blob(
+    client_with_user, session, mocker
+):
+    content = b"\x89PNG\r\n\x1a\n" + b"race" * 1000
+    write_blob = wishes_uploads.write_blob
+
+    # The other upload commits its row between the existence check and ours.
+    def write_and_race(source, path, *args):
+        write_blob(source, path, *args)
+        with Session(engine) as other:
+            other.add(
+                UploadBlob(
+                    sha256=path.stem, mime="image/png", size=len(content), ref_count=1
+                )
+            )
+            other.commit()
+
+    mocker.patch.object(wishes_uploads, "write_blob", side_effect=write_and_race)
+    uploaded = upload(client_with_user, content)
+
+    assert uploaded["deduplicated"] is True
+    session.expire_all()
+    assert session.get(UploadBlob, uploaded["sha256"]).ref_count == 2
+
+
+def test_unreferenced_blobs_are_collected(client_with_user, session):
+    wish_id = client_with_user.post("/api/v1/wishes/", json={"title": "W"}).json()["id"]
+    content = b"\xff\xd8\xff\xe0" + b"gc" * 1000
+    attached = upload(client_with_user, content, params={"wish_id": wish_id})
+    loose = upload(client_with_user, content)
+    path = UPLOAD_DIR / attached["filename"]
+
+    assert client_with_user.delete(f"/api/v1/wishes/{wish_id}").status_code == 200
+    assert wishes_uploads.collect_unreferenced_blobs(session, UPLOAD_DIR) == 0
+    assert path.exists()
+
+    response = client_with_user.delete(f"/api/v1/wishes/upload/{loose['id']}")
+    assert response.status_code == 200
+    assert wishes_uploads.collect_unreferenced_blobs(session, UPLOAD_DIR) == 1
+    assert not path.exists()
+    assert session.get(UploadBlob, attached["sha256"]) is None
+
+
+def test_orphan_blob_files_are_removed_after_min_age(tmp_path):
+    db = create_engine(f"sqlite:///{tmp_path / 'gc.sqlite'}")
+    SQLModel.metadata.create_all(db)
+    directory = tmp_path / "blobs"
+    directory.mkdir()
+    known, orphan, fresh = (hashlib.sha256(n).hexdigest() for n in (b"a", b"b", b"c"))
+    with Session(db) as gc_session:
+        gc_session.add(UploadBlob(sha256=known, mime="image/png", size=1))
+        gc_session.commit()
+
+    old = time.time() - 2 * wishes_uploads.UPLOAD_ORPHAN_MIN_AGE_SECONDS
+    for name in (f"{known}.png", f"{orphan}.png", f"{fresh}.jpg", "legacy.png"):
+        (directory / name).write_bytes(b"x")
+        if name != f"{fresh}.jpg":
+            os.utime(directory / name, (old, old))
+
+    assert wishes_uploads.remove_orphan_blobs(db, directory) == 1
+    assert sorted(p.name for p in directory.iterdir()) == sorted(
+        [f"{known}.png", f"{fresh}.jpg", "legacy.png"]
+    )
+    db.dispose()
+
+
+def test_stored_blobs_are_world_readable(client_with_user):
+    uploaded = upload(client_with_user, b"\x89PNG\r\n\x1a\n" + b"mode" * 100)
+    mode = (UPLOAD_DIR / uploaded["filename"]).stat().st_mode
+    assert stat.S_IMODE(mode) == 0o644
+
+
+def test_upload_to_foreign_wish_is_rejected(client_with_user, session, another_user):
+    wish = Wish(title="Theirs", owner_id=another_user["user"].id)
+    session.add(wish)
+    session.commit()
+
+    response = client_with_user.post(
+        "/api/v1/wishes/upload",
+        params={"wish_id": wish.id},
+        files={"file": ("a.png", io.BytesIO(b"\x89PNG\r\n\x1a\n"), "image/png")},
+    )
+    assert response.status_code == 404
+
+
+def upload(test_client, content, params=None):
+    response = test_client.post(
+        "/api/v1/wishes/upload",
+        params=params,
+        files={"file": ("image", io.BytesIO(content), "image/png")},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_download_upload_with_cache_headers(client_with_user):
+    content = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 400
+    uploaded = upload(client_with_user, content)
+    url = f"/api/v1/wishes/upload/{uploaded['id']}"
+
+    response = client_with_user.get(url)
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["ETag"] == f'"{uploaded["sha256"]}"'
+    assert "immutable" in response.headers["Cache-Control"]
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+    etag = response.headers["ETag"]
+    assert client_with_user.get(url, headers={"If-None-Match": etag}).status_code == 304
+    since = response.headers["Last-Modified"]
+    assert client_with_user.get(
+        url, headers={"If-Modified-Since": since}
+    ).status_code == (304)
+
+
+@pytest.mark.parametrize(
+    "range_header, start, end",
+    [("bytes=0-9", 0, 9), ("bytes=100-", 100, None), ("bytes=-16", -16, None)],
+)
+def test_download_upload_range(client_with_user, range_header, start, end):
+    content = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 40
+    uploaded = upload(client_with_user, content)
+
+    response = client_with_user.get(
+        f"/api/v1/wishes/upload/{uploaded['id']}", headers={"Range": range_header}
+    )
+    assert response.status_code == 206
+    stop = end + 1 if end is not None else None
+    expected = content[slice(start, stop)]
+    assert response.content == expected
+    first = start % len(content)
+    assert response.headers["Content-Range"] == (
+        f"bytes {first}-{first + len(expected) - 1}/{len(content)}"
+    )
+
+
+def test_download_upload_unsatisfiable_range(client_with_user):
+    uploaded = upload(client_with_user, b"\x89PNG\r\n\x1a\n" + b"x" * 10)
+
+    response = client_with_user.get(
+        f"/api/v1/wishes/upload/{uploaded['id']}", headers={"Range": "bytes=500-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */18"
+
+
+def test_download_foreign_upload_is_hidden(client_with_user, session, another_user):
+    uploaded = upload(client_with_user, b"\x89PNG\r\n\x1a\n" + b"mine")
+    ref = UploadRef(sha256=uploaded["sha256"], owner_id=another_user["user"].id)
+    session.add(ref)
+    session.commit()
+
+    assert client_with_user.get(f"/api/v1/wishes/upload/{ref.id}").status_code == 404
+
+
+def test_head_download_sends_headers_only(client_with_user):
+    content = b"\x89PNG\r\n\x1a\n" + b"h" * 100
+    uploaded = upload(client_with_user, content)
+
+    response = client_with_user.head(f"/api/v1/wishes/upload/{uploaded['id']}")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == str(len(content))
+    assert response.headers["ETag"] == f'"{uploaded["sha256"]}"'
+
+
+def test_file_slice_uses_zero_copy_send_when_advertised(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(bytes(range(256)))
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "extensions": {"http.response.zerocopysend": {}},
+    }
+    messages, sent = [], []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.zerocopysend":
+            # What a server does with the message: sendfile() from the file.
+            fd = message["file"].fileno()
+            sent.append(os.pread(fd, message["count"], message["offset"]))
+
+    asyncio.run(FileSliceResponse(path, 10, 20, status_code=206)(scope, receive, send))
+
+    assert [m["type"] for m in messages] == [
+        "http.response.start",
+        "http.response.zerocopysend",
+    ]
+    assert messages[0]["status"] == 206
+    assert sent == [bytes(range(10, 30))]
@@ -0,0 +1,58 @@
+import threading
+
+from src.wishlist_api.app.utils.metrics import Histogram
+
+
+def metric_value(text: str, sample: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_endpoint_is_disabled_by_default(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_endpoint_reports_requests_and_queries(client_with_user, mocker):
+    mocker.patch("src.wishlist_api.app.main.METRICS_ENABLED", True)
+    route = 'method="GET",route="/api/v1/wishes/{wish_id}",status="404"'
+    before = client_with_user.get("/metrics").text
+
+    assert client_with_user.get("/api/v1/wishes/999").status_code == 404
+    client_with_user.post("/api/v1/wishes/", json={"title": "Metered"})
+
+    r = client_with_user.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    sample = f"http_request_duration_seconds_count{{{route}}}"
+    assert metric_value(text, sample) == metric_value(before, sample) + 1
+    insert = 'db_query_duration_seconds_count{operation="INSERT"}'
+    assert metric_value(text, insert) > metric_value(before, insert)
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert "http_requests_in_flight 1" in text
+    assert "threadpool_max_threads 40" in text
+    assert "list_cache_hits " in text
+
+
+def test_histogram_merges_thread_shards():
+    histogram = Histogram("test_seconds", "Test", ("kind",), buckets=(0.1, 1))
+
+    def record():
+        for _ in range(1000):
+            histogram.observe(0.5, "a")
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    histogram.observe(2, "a")
+
+    lines = list(histogram.render())
+    assert 'test_seconds_bucket{kind="a",le="0.1"} 0' in lines
+    assert 'test_seconds_bucket{kind="a",le="1"} 4000' in lines
+    assert 'test_seconds_bucket{kind="a",le="+Inf"} 4001' in lines
+    assert 'test_seconds_sum{kind="a"} 2002' in lines
+    assert len(histogram._shards) == 1
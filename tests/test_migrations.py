@@ -0,0 +1,106 @@
+import hashlib
+import threading
+
+from sqlalchemy import create_engine, inspect
+from sqlmodel import SQLModel
+
+from src.wishlist_api.adapters.migrations import (
+    MIGRATIONS,
+    applied_versions,
+    run_migrations,
+)
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE user (id INTEGER NOT NULL PRIMARY KEY, username VARCHAR NOT NULL, "
+    "password_hash VARCHAR NOT NULL, role VARCHAR(5) NOT NULL)",
+    "CREATE TABLE wish (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR NOT NULL, "
+    "link VARCHAR, price_estimate NUMERIC, notes VARCHAR, "
+    "owner_id INTEGER NOT NULL REFERENCES user (id))",
+    "CREATE TABLE revokedtoken (id INTEGER NOT NULL PRIMARY KEY, "
+    "token VARCHAR NOT NULL, revoked_at DATETIME NOT NULL, expires_at DATETIME)",
+    "INSERT INTO user VALUES (1, 'legacy', 'hash', 'USER')",
+    "INSERT INTO wish VALUES (1, 'Old wish', NULL, 12.5, NULL, 1)",
+    "INSERT INTO revokedtoken VALUES (1, 'old.jwt.token', '2024-01-01 00:00:00', NULL)",
+    "INSERT INTO revokedtoken VALUES (2, 'old.jwt.token', '2024-01-02 00:00:00', NULL)",
+]
+
+
+def index_names(engine, table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+def legacy_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+    return engine
+
+
+def test_migrations_upgrade_legacy_database(tmp_path):
+    engine = legacy_engine(tmp_path / "legacy.sqlite")
+
+    SQLModel.metadata.create_all(engine)
+    ran = run_migrations(engine)
+
+    assert ran == [version for version, _, _ in MIGRATIONS]
+    assert {"ix_wish_owner_id_id", "ix_wish_owner_id_price_cents"} <= index_names(
+        engine, "wish"
+    )
+    assert {
+        "ix_revokedtoken_token_hash",
+        "ix_revokedtoken_expires_at",
+    } <= index_names(engine, "revokedtoken")
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT price_cents FROM wish").scalar() == 1250
+        assert conn.exec_driver_sql("SELECT version FROM wish").scalar() == 1
+        assert (
+            conn.exec_driver_sql(
+                "SELECT rowid FROM wish_fts WHERE wish_fts MATCH 'old'"
+            ).scalar()
+            == 1
+        )
+        assert conn.exec_driver_sql("SELECT token_hash FROM revokedtoken").all() == [
+            (hashlib.sha256(b"old.jwt.token").hexdigest(),)
+        ]
+
+    assert run_migrations(engine) == []
+    assert applied_versions(engine) == {version for version, _, _ in MIGRATIONS}
+
+
+def test_migrations_are_noop_on_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.sqlite'}")
+    SQLModel.metadata.create_all(engine)
+    before = {t: index_names(engine, t) for t in ("wish", "revokedtoken")}
+
+    run_migrations(engine)
+
+    assert {t: index_names(engine, t) for t in ("wish", "revokedtoken")} == before
+
+
+def test_concurrent_runners_apply_each_migration_once(tmp_path):
+    path = tmp_path / "race.sqlite"
+    legacy_engine(path).dispose()
+    barrier = threading.Barrier(2)
+    results, errors = [], []
+
+    def runner():
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            barrier.wait()
+            results.append(run_migrations(engine))
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            engine.dispose()
+
+    threads = [threading.Thread(target=runner) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    ran = sorted(version for result in results for version in result)
+    assert ran == [version for version, _, _ in MIGRATIONS]
@@ -0,0 +1,60 @@
+import pytest
+
+from src.wishlist_api.app.security import create_access_token
+from src.wishlist_api.domain.models import User, UserRole
+
+
+@pytest.fixture()
+def profile_dir(tmp_path, mocker):
+    mocker.patch("src.wishlist_api.app.utils.profiling.PROFILE_DIR", tmp_path)
+    return tmp_path
+
+
+def bearer_headers_for(session, username, role):
+    user = User(username=username, password_hash="hash", role=role)
+    session.add(user)
+    session.commit()
+    token = create_access_token({"sub": str(user.id), "role": role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_admin_can_profile_a_request(client, session, profile_dir):
+    headers = bearer_headers_for(session, "profiler", UserRole.admin)
+
+    r = client.get(
+        "/api/v1/wishes/",
+        headers={**headers, "X-Profile": "1", "X-Correlation-ID": "slow-list-1"},
+    )
+    assert r.status_code == 200
+    assert r.headers["X-Profile"] == "/api/v1/admin/profiles/slow-list-1"
+    assert (profile_dir / "slow-list-1.folded").is_file()
+
+    r = client.get("/api/v1/admin/profiles/slow-list-1", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    stack, _, count = r.text.splitlines()[0].rpartition(" ")
+    assert ";" in stack and int(count) >= 1
+
+
+def test_profiling_is_admin_only(client, session, profile_dir):
+    headers = bearer_headers_for(session, "regular", UserRole.user)
+
+    r = client.get("/api/v1/wishes/", headers=headers)
+    assert r.status_code == 200
+    assert "X-Profile" not in r.headers
+
+    r = client.get("/api/v1/wishes/", headers={**headers, "X-Profile": "1"})
+    assert r.status_code == 403
+    assert r.headers["content-type"] == "application/problem+json"
+    assert client.get("/api/v1/admin/profiles/x", headers=headers).status_code == 403
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_profile_key_must_be_a_plain_id(client, session, profile_dir):
+    headers = bearer_headers_for(session, "profiler2", UserRole.admin)
+    r = client.get(
+        "/api/v1/wishes/",
+        headers={**headers, "X-Profile": "1", "X-Correlation-ID": "../etc/passwd"},
+    )
+    assert r.status_code == 400
+    assert list(profile_dir.iterdir()) == []
@@ -1,7 +1,11 @@
+import importlib
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 
 from src.wishlist_api.app.main import app
+from src.wishlist_api.app.utils.rate_limit import RateBudget, TokenBucketLimiter
 
 
 @pytest.fixture()
@@ -50,3 +54,72 @@ def test_unauthorized_access_problem_details(client):
     )
     problem = assert_problem_response(resp, 401)
     assert "Invalid" in problem["detail"] or "token" in problem["detail"]
+
+
+def test_correlation_id_is_echoed_in_problem_details(client):
+    resp = client.post(
+        "/api/v1/auth/logout",
+        headers={"Authorization": "Bearer invalid_token", "X-Correlation-ID": "cid-1"},
+    )
+    assert resp.headers["X-Correlation-ID"] == "cid-1"
+    assert resp.json()["correlation_id"] == "cid-1"
+
+
+def test_chunked_body_over_limit_returns_problem_details(client, mocker):
+    mocker.patch("src.wishlist_api.app.middleware.MAX_REQUEST_SIZE", 16)
+
+    def body():
+        yield b'{"username": "chunked", '
+        yield b'"password": "Password123_"}'
+
+    resp = client.post(
+        "/api/v1/auth/register",
+        content=body(),
+        headers={"Content-Type": "application/json"},
+    )
+    assert "content-length" not in resp.request.headers
+    assert resp.status_code == 413
+    assert resp.json()["title"] == "PAYLOAD_TOO_LARGE"
+
+
+def test_rate_limited_request_returns_problem_details(client, mocker):
+    mocker.patch(
+        "src.wishlist_api.app.middleware.RATE_LIMIT_BUDGETS",
+        [(None, "/api/v1/", RateBudget("default", 2, 0.5))],
+    )
+    mocker.patch("src.wishlist_api.app.middleware.RATE_LIMIT_IP_FACTOR", 1)
+    security = importlib.import_module("src.wishlist_api.app.security")
+    decode = mocker.spy(security, "decode_access_token")
+    headers = {"Authorization": "Bearer some-token", "X-Correlation-ID": "cid-2"}
+
+    first = client.get("/api/v1/wishes/", headers=headers)
+    assert first.status_code == 401
+    assert first.headers["RateLimit-Limit"] == "2"
+    assert first.headers["RateLimit-Remaining"] == "1"
+    client.get("/api/v1/wishes/", headers=headers)
+    decode.reset_mock()
+
+    resp = client.get("/api/v1/wishes/", headers=headers)
+    assert resp.status_code == 429
+    assert resp.headers["content-type"] == "application/problem+json"
+    assert resp.headers["Retry-After"] == "2"
+    assert resp.headers["RateLimit-Remaining"] == "0"
+    assert resp.headers["RateLimit-Policy"] == "2;w=4"
+    assert resp.json()["correlation_id"] == "cid-2"
+    decode.assert_not_called()
+
+    assert client.get("/health").status_code == 200
+
+
+def test_token_bucket_refills_over_time():
+    limiter = TokenBucketLimiter(max_keys=10)
+    budget = RateBudget("test", 2, 1)
+    now = time.time()
+
+    assert limiter.acquire("key", budget, now=now).allowed
+    assert limiter.acquire("key", budget, now=now).allowed
+    denied = limiter.acquire("key", budget, now=now + 0.5)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(0.5)
+    assert limiter.acquire("key", budget, now=now + 1).allowed
+    assert limiter.acquire("other", budget, now=now + 1).remaining == 1
@@ -1,21 +1,44 @@
-from datetime import timedelta
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
 from unittest.mock import Mock
 
 import pytest
 from fastapi.security import HTTPAuthorizationCredentials
 from jose import jwt
-from sqlmodel import Session
+from sqlmodel import Session, select
 
+from src.wishlist_api.app import security
 from src.wishlist_api.app.security import (
     ALGORITHM,
     JWT_SECRET_CURRENT,
     create_access_token,
     get_current_user,
     get_password_hash,
+    hash_password_async,
+    key_ring,
+    load_user,
+    user_cache,
     verify_password,
+    verify_password_async,
+)
+from src.wishlist_api.app.utils.executors import BoundedExecutor
+from src.wishlist_api.app.utils.keyring import KeyRing
+from src.wishlist_api.app.utils.token_sweeper import TokenSweeper
+from src.wishlist_api.app.utils.token_utils import (
+    RevocationCache,
+    RevokedToken,
+    is_token_revoked,
+    revoke_token,
+    token_digest,
+)
+from src.wishlist_api.domain.models import User, UserRole
+from src.wishlist_api.shared.errors import (
+    AuthenticationError,
+    NotFoundError,
+    ServiceUnavailableError,
 )
-from src.wishlist_api.domain.models import User
-from src.wishlist_api.shared.errors import AuthenticationError, NotFoundError
 
 
 def test_password_hash_and_verify():
@@ -94,3 +117,220 @@ def test_get_current_user_user_not_found(mocker):
 
     with pytest.raises(NotFoundError):
         get_current_user(credentials=credentials, session=mock_session)
+
+
+def test_revoked_token_stored_as_digest(session):
+    token = create_access_token({"sub": "7"})
+    assert not is_token_revoked(session, token)
+
+    revoke_token(session, token)
+    assert is_token_revoked(session, token)
+
+    stored = session.exec(select(RevokedToken)).one()
+    assert stored.token_hash == token_digest(token)
+    assert token not in stored.model_dump().values()
+
+
+def test_revocation_cache_skips_db_when_fresh():
+    cache = RevocationCache(sync_interval=60)
+    mock_session = Mock(spec=Session)
+    mock_session.exec.return_value.all.return_value = [
+        (1, token_digest("revoked"), None)
+    ]
+
+    cache.sync(mock_session)
+    mock_session.exec.reset_mock()
+
+    assert cache.contains(token_digest("revoked"))
+    assert not cache.contains(token_digest("other"))
+    assert cache.is_fresh()
+    mock_session.exec.assert_not_called()
+
+
+def test_revocation_seen_from_other_worker(session):
+    cache = RevocationCache(sync_interval=0)
+    cache.load(session)
+    session.add(RevokedToken(token_hash=token_digest("elsewhere")))
+    session.commit()
+
+    assert not cache.contains(token_digest("elsewhere"))
+    cache.sync(session)
+    assert cache.contains(token_digest("elsewhere"))
+
+
+def test_token_sweeper_purges_expired_in_batches(session):
+
+    past = datetime.utcnow() - timedelta(minutes=1)
+    future = datetime.utcnow() + timedelta(minutes=10)
+    for i in range(5):
+        session.add(RevokedToken(token_hash=f"expired-{i}", expires_at=past))
+    session.add(RevokedToken(token_hash="alive", expires_at=future))
+    session.commit()
+
+    sweeper = TokenSweeper(interval=0, batch_size=2)
+    purged = asyncio.run(sweeper.run_once())
+
+    assert purged == 5
+    assert sweeper.stats()["last_purged"] == 5
+    assert sweeper.stats()["runs"] == 1
+    remaining = session.exec(select(RevokedToken)).all()
+    assert [t.token_hash for t in remaining] == ["alive"]
+
+
+def test_hash_password_async_roundtrip():
+
+    async def roundtrip():
+        hashed = await hash_password_async("SecurePass1!")
+        return (
+            await verify_password_async("SecurePass1!", hashed),
+            await verify_password_async("wrongpass", hashed),
+        )
+
+    assert asyncio.run(roundtrip()) == (True, False)
+
+
+def test_bounded_executor_rejects_when_full():
+
+    executor = BoundedExecutor(max_workers=1, max_queue=1, name="test")
+    gate = threading.Event()
+
+    async def saturate():
+        running = [asyncio.ensure_future(executor.run(gate.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert executor.busy() == 2
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            await executor.run(gate.wait)
+        gate.set()
+        await asyncio.gather(*running)
+        return exc_info.value.status_code
+
+    assert asyncio.run(saturate()) == 503
+    assert executor.busy() == 0
+
+
+def test_verified_payload_cached_until_logout(mocker, session):
+    token = create_access_token({"sub": "5"})
+    first = security.verify_access_token(token)
+
+    decode = mocker.patch.object(security.jwt, "decode")
+    assert security.verify_access_token(token) == first
+    decode.assert_not_called()
+
+    mocker.stopall()
+    security.logout_user(token, session)
+    assert security.token_cache.get(token_digest(token)) is None
+
+
+def test_access_token_carries_kid_of_active_key():
+    token = create_access_token({"sub": "1"})
+    assert jwt.get_unverified_header(token)["kid"] == key_ring.active_kid
+
+
+def test_key_ring_rotation_selects_key_by_kid(mocker):
+    ring = KeyRing({"old": "old-secret"}, "old")
+    mocker.patch.object(security, "key_ring", ring)
+
+    old_token = create_access_token({"sub": "1"})
+    ring.rotate("new", "new-secret")
+    new_token = create_access_token({"sub": "2"})
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "new"
+    assert security.decode_access_token(old_token) == ("old", mocker.ANY)
+    assert security.decode_access_token(new_token)[1]["sub"] == "2"
+
+    ring.retire("old")
+    with pytest.raises(AuthenticationError):
+        security.verify_access_token(old_token)
+
+
+def test_key_ring_reloads_rotation_from_other_worker(tmp_path):
+    path = tmp_path / "keyring.json"
+    writer = KeyRing({"k1": "s1"}, "k1", path=path, reload_seconds=0)
+    reader = KeyRing({"k1": "s1"}, "k1", path=path, reload_seconds=0)
+
+    kid = writer.rotate()
+
+    assert reader.active_kid == kid
+    assert reader.get("k1") == "s1"
+
+
+def test_key_ring_file_merges_env_keys_and_never_stores_them(tmp_path, caplog):
+    path = tmp_path / "keyring.json"
+    path.write_text(json.dumps({"active": "k1", "keys": {"k1": "s1", "current": "x"}}))
+
+    ring = KeyRing({"current": "env", "previous": "old"}, "current", path=path)
+
+    assert ring.active_kid == "k1"
+    assert ring.get("previous") == "old"
+    assert ring.get("current") == "x"
+    assert "overrides its env secret" in caplog.text
+
+    ring.rotate("k2", "s2")
+    stored = json.loads(path.read_text())["keys"]
+    assert "previous" not in stored
+    assert set(stored) == {"k2", "k1", "current"}
+
+    ring.retire("previous")
+    other = KeyRing({"current": "env", "previous": "old"}, "current", path=path)
+    assert other.get("previous") is None
+
+
+def test_admin_rotates_and_retires_jwt_keys(client, session, mocker):
+    ring = KeyRing({"old": "old-secret"}, "old")
+    mocker.patch.object(security, "key_ring", ring)
+    admin = User(username="keymaster", password_hash="hash", role=UserRole.admin)
+    regular = User(username="keyless", password_hash="hash")
+    session.add_all([admin, regular])
+    session.commit()
+
+    def bearer(user):
+        token = create_access_token({"sub": str(user.id), "role": user.role.value})
+        return {"Authorization": f"Bearer {token}"}
+
+    old_headers = bearer(admin)
+    r = client.post("/api/v1/admin/jwt-keys/rotate", headers=bearer(regular))
+    assert r.status_code == 403
+
+    r = client.post("/api/v1/admin/jwt-keys/rotate", headers=old_headers)
+    assert r.status_code == 200
+    new_kid = r.json()["active"]
+    assert new_kid != "old"
+    assert r.json()["kids"] == [new_kid, "old"]
+
+    new_headers = bearer(admin)
+    token = new_headers["Authorization"].split()[1]
+    assert jwt.get_unverified_header(token)["kid"] == new_kid
+    r = client.delete(f"/api/v1/admin/jwt-keys/{new_kid}", headers=new_headers)
+    assert r.status_code == 400
+    r = client.delete("/api/v1/admin/jwt-keys/missing", headers=new_headers)
+    assert r.status_code == 404
+
+    r = client.delete("/api/v1/admin/jwt-keys/old", headers=old_headers)
+    assert r.status_code == 200
+    assert r.json() == {"active": new_kid, "kids": [new_kid]}
+    assert client.get("/api/v1/admin/jwt-keys", headers=old_headers).status_code == 401
+    assert client.get("/api/v1/admin/jwt-keys", headers=new_headers).status_code == 200
+
+
+def test_current_user_served_from_cache_until_promoted(client, session):
+    user = User(username="cached", password_hash="hash")
+    session.add(user)
+    session.commit()
+
+    load_user(session, user.id)
+    assert user_cache.get(user.id) is not None
+
+    mock_session = Mock(spec=Session)
+    cached = load_user(mock_session, user.id)
+    mock_session.get.assert_not_called()
+    assert cached.username == "cached"
+
+    admin = User(username="boss", password_hash="hash", role=UserRole.admin)
+    session.add(admin)
+    session.commit()
+    token = create_access_token({"sub": str(admin.id), "role": "admin"})
+    r = client.post(
+        "/api/v1/auth/promote/cached", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert r.status_code == 200
+    assert load_user(session, user.id).role == UserRole.admin
@@ -1,4 +1,16 @@
+import asyncio
+import csv
+import io
+import json
+
 import pytest
+from sqlalchemy import text
+
+from src.wishlist_api.adapters.search import wish_match_expression
+from src.wishlist_api.app.api.wishes import list_cache
+from src.wishlist_api.app.utils.pagination import encode_cursor
+from src.wishlist_api.app.utils.wish_formats import WishRecordParser
+from src.wishlist_api.domain.models import User, Wish
 
 API_PREFIX = "/api/v1/wishes/"
 
@@ -195,3 +207,469 @@ def test_delete_wish_forbidden(client_with_user, another_user, client):
 def test_delete_wish_not_found(client_with_user):
     response = client_with_user.delete(f"{API_PREFIX}9999")
     assert response.status_code == 404
+
+
+def test_list_wishes_cursor_pagination(client_with_user):
+    for i in range(5):
+        client_with_user.post(API_PREFIX, json={"title": f"Paged {i}"})
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client_with_user.get(API_PREFIX, params=params)
+        assert response.status_code == 200
+        seen.extend(w["title"] for w in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            assert "Link" not in response.headers
+            break
+        assert 'rel="next"' in response.headers["Link"]
+        params = {"limit": 2, "cursor": next_cursor}
+
+    assert seen == [f"Paged {i}" for i in range(5)]
+
+
+def test_list_wishes_invalid_cursor(client_with_user):
+    response = client_with_user.get(API_PREFIX, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_list_wishes_price_range(client_with_user):
+    for title, price in [("A", 5), ("B", 19.99), ("C", 20), ("D", 150)]:
+        client_with_user.post(
+            API_PREFIX, json={"title": title, "price_estimate": price}
+        )
+    client_with_user.post(API_PREFIX, json={"title": "Unpriced"})
+
+    response = client_with_user.get(
+        API_PREFIX, params={"price_min": 10, "price_max": 20}
+    )
+    assert response.status_code == 200
+    assert [w["title"] for w in response.json()] == ["B", "C"]
+
+
+@pytest.mark.parametrize(
+    "sort,expected",
+    [
+        ("price", ["Unpriced", "Cheap", "Mid 1", "Mid 2", "Pricey"]),
+        ("-price", ["Pricey", "Mid 2", "Mid 1", "Cheap", "Unpriced"]),
+    ],
+)
+def test_list_wishes_sorted_by_price_with_cursor(client_with_user, sort, expected):
+    for title, price in [
+        ("Pricey", 300),
+        ("Mid 1", 50),
+        ("Unpriced", None),
+        ("Cheap", 1),
+        ("Mid 2", 50),
+    ]:
+        client_with_user.post(
+            API_PREFIX, json={"title": title, "price_estimate": price}
+        )
+
+    seen = []
+    params = {"sort": sort, "limit": 2}
+    while True:
+        response = client_with_user.get(API_PREFIX, params=params)
+        assert response.status_code == 200
+        seen.extend(w["title"] for w in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params = {"sort": sort, "limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+
+    assert seen == expected
+
+
+def test_list_wishes_cursor_sort_mismatch(client_with_user):
+    for i in range(3):
+        client_with_user.post(API_PREFIX, json={"title": f"W{i}", "price_estimate": i})
+    response = client_with_user.get(API_PREFIX, params={"limit": 1})
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client_with_user.get(
+        API_PREFIX, params={"sort": "price", "cursor": cursor}
+    )
+    assert response.status_code == 400
+
+
+def test_batch_wishes_mixed_operations(client_with_user, client, another_user):
+    keep = client_with_user.post(API_PREFIX, json={"title": "Keep"}).json()["id"]
+    drop = client_with_user.post(API_PREFIX, json={"title": "Drop"}).json()["id"]
+
+    from src.wishlist_api.app.main import app
+    from src.wishlist_api.app.security import get_current_user
+
+    original_user = app.dependency_overrides[get_current_user]
+    app.dependency_overrides[get_current_user] = lambda: another_user["user"]
+    foreign = client.post(API_PREFIX, json={"title": "Foreign"}).json()["id"]
+    app.dependency_overrides[get_current_user] = original_user
+
+    response = client_with_user.post(
+        f"{API_PREFIX}batch",
+        json={
+            "operations": [
+                {"op": "create", "data": {"title": "New 1", "price_estimate": 5}},
+                {"op": "create", "data": {"title": "New 2"}},
+                {"op": "update", "id": keep, "data": {"price_estimate": 42}},
+                {"op": "delete", "id": drop},
+                {"op": "delete", "id": foreign},
+                {"op": "delete", "id": drop},
+            ]
+        },
+    )
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [201, 201, 200, 204, 404, 409]
+
+    listed = client_with_user.get(API_PREFIX, params={"sort": "price"}).json()
+    assert [(w["title"], w["price_estimate"]) for w in listed] == [
+        ("New 2", None),
+        ("New 1", 5),
+        ("Keep", 42),
+    ]
+    assert listed[1]["id"] == results[0]["id"]
+
+
+def test_batch_wishes_rejects_invalid_item(client_with_user):
+    response = client_with_user.post(
+        f"{API_PREFIX}batch",
+        json={"operations": [{"op": "create", "data": {"title": ""}}]},
+    )
+    assert response.status_code == 422
+
+
+def test_batch_wishes_rejects_null_title_per_item(client_with_user):
+    wish_id = client_with_user.post(API_PREFIX, json={"title": "Keep"}).json()["id"]
+
+    response = client_with_user.post(
+        f"{API_PREFIX}batch",
+        json={
+            "operations": [
+                {"op": "update", "id": wish_id, "data": {"title": None}},
+                {"op": "create", "data": {"title": "Added"}},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["status"] == 422
+    assert results[0]["detail"] == "title: may not be null"
+    assert results[1]["status"] == 201
+    assert client_with_user.get(f"{API_PREFIX}{wish_id}").json()["title"] == "Keep"
+
+    response = client_with_user.patch(f"{API_PREFIX}{wish_id}", json={"title": None})
+    assert response.status_code == 400
+
+
+def test_export_wishes_ndjson_in_chunks(client_with_user, mocker):
+    mocker.patch("src.wishlist_api.app.api.wishes.EXPORT_CHUNK_SIZE", 2)
+    for i in range(5):
+        client_with_user.post(API_PREFIX, json={"title": f"E{i}", "price_estimate": i})
+
+    response = client_with_user.get(f"{API_PREFIX}export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["title"] for r in records] == [f"E{i}" for i in range(5)]
+    assert records[3]["price_estimate"] == 3
+
+
+def test_export_wishes_csv_escapes_formulas(client_with_user):
+    client_with_user.post(API_PREFIX, json={"title": "=HYPERLINK(1)", "notes": "ok"})
+
+    response = client_with_user.get(f"{API_PREFIX}export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "title", "link", "price_estimate", "notes"]
+    assert rows[1][1] == "'=HYPERLINK(1)"
+
+
+def test_csv_export_round_trips_through_import(client_with_user):
+    titles = ["-50% coupon", "@home", "'=quoted", "'plain"]
+    for title in titles:
+        client_with_user.post(API_PREFIX, json={"title": title, "notes": "+1"})
+
+    exported = client_with_user.get(f"{API_PREFIX}export", params={"format": "csv"})
+    response = client_with_user.post(
+        f"{API_PREFIX}import", params={"format": "csv"}, content=exported.content
+    )
+    assert response.json()["accepted"] == len(titles)
+
+    wishes = client_with_user.get(API_PREFIX).json()
+    assert [w["title"] for w in wishes] == titles * 2
+    assert {w["notes"] for w in wishes} == {"+1"}
+
+
+def test_import_wishes_ndjson_reports_bad_rows(client_with_user, mocker):
+    mocker.patch("src.wishlist_api.app.api.wishes.IMPORT_BATCH_SIZE", 2)
+    body = (
+        '{"title": "I1", "price_estimate": 1}\n'
+        "not json\n"
+        '{"title": "", "price_estimate": 2}\n'
+        '{"title": "I2", "id": 999}\n'
+        '{"title": "I3"}'
+    )
+
+    response = client_with_user.post(f"{API_PREFIX}import", content=body.encode())
+    assert response.status_code == 200
+    result = response.json()
+    assert result["accepted"] == 3
+    assert result["rejected"] == 2
+    assert [e["line"] for e in result["errors"]] == [2, 3]
+
+    titles = [w["title"] for w in client_with_user.get(API_PREFIX).json()]
+    assert titles == ["I1", "I2", "I3"]
+
+
+def test_import_wishes_csv_with_multiline_field(client_with_user):
+    body = 'title,notes,price_estimate\nA,"line one\nline two",5\nB,,\n'
+
+    response = client_with_user.post(
+        f"{API_PREFIX}import", params={"format": "csv"}, content=body.encode()
+    )
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 2, "rejected": 0, "errors": []}
+
+    wishes = client_with_user.get(API_PREFIX).json()
+    assert wishes[0]["notes"] == "line one\nline two"
+    assert wishes[0]["price_estimate"] == 5
+    assert wishes[1]["title"] == "B"
+
+
+def test_import_wishes_rejects_oversized_chunked_body(client_with_user, mocker):
+    mocker.patch("src.wishlist_api.app.api.wishes.IMPORT_BATCH_SIZE", 1)
+    mocker.patch.dict(
+        "src.wishlist_api.app.middleware.REQUEST_SIZE_LIMITS",
+        {"/api/v1/wishes/import": 45},
+    )
+    # Several body messages with no Content-Length, as a chunked upload arrives.
+    chunks = [
+        b'{"title": "first"}\n',
+        b'{"title": "second"}\n',
+        b'{"title": "third"}\n',
+    ]
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks
+    ]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": f"{API_PREFIX}import",
+        "raw_path": f"{API_PREFIX}import".encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(client_with_user.app(scope, receive, send))
+
+    assert sent[0]["status"] == 413
+    body = json.loads(b"".join(m.get("body", b"") for m in sent[1:]))
+    assert body["detail"].startswith("Import stopped after 2 rows")
+    assert len(messages) == 1
+
+    titles = [w["title"] for w in client_with_user.get(API_PREFIX).json()]
+    assert titles == ["first", "second"]
+
+
+def test_record_parser_drops_oversized_record_across_chunks():
+    parser = WishRecordParser("ndjson", 32)
+    chunks = [
+        b'{"title": "A"}\n{"title": "',
+        b"x" * 40,
+        b"y" * 40,
+        b'"}\nnot json\n{"title": "B"}',
+    ]
+
+    records = [record for chunk in chunks for record in parser.feed(chunk)]
+    records += parser.close()
+
+    assert records == [
+        (1, {"title": "A"}, None),
+        (2, None, "Record exceeds size limit"),
+        (3, None, "Invalid JSON"),
+        (4, {"title": "B"}, None),
+    ]
+
+
+def test_get_wish_etag_and_not_modified(client_with_user):
+    wish_id = client_with_user.post(API_PREFIX, json={"title": "Cached"}).json()["id"]
+
+    response = client_with_user.get(f"{API_PREFIX}{wish_id}")
+    etag = response.headers["ETag"]
+    assert etag == f'"{wish_id}-1"'
+
+    cached = client_with_user.get(
+        f"{API_PREFIX}{wish_id}", headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    client_with_user.patch(f"{API_PREFIX}{wish_id}", json={"notes": "changed"})
+    fresh = client_with_user.get(
+        f"{API_PREFIX}{wish_id}", headers={"If-None-Match": etag}
+    )
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] == f'"{wish_id}-2"'
+
+
+def test_list_wishes_etag_changes_with_page(client_with_user):
+    first = client_with_user.post(API_PREFIX, json={"title": "L1"}).json()["id"]
+    etag = client_with_user.get(API_PREFIX).headers["ETag"]
+
+    cached = client_with_user.get(API_PREFIX, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    client_with_user.patch(f"{API_PREFIX}{first}", json={"title": "L1 edited"})
+    changed = client_with_user.get(API_PREFIX, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+    client_with_user.post(API_PREFIX, json={"title": "L2"})
+    assert (
+        client_with_user.get(
+            API_PREFIX, headers={"If-None-Match": changed.headers["ETag"]}
+        ).status_code
+        == 200
+    )
+
+
+def test_update_and_delete_wish_if_match(client_with_user):
+    wish_id = client_with_user.post(API_PREFIX, json={"title": "Guarded"}).json()["id"]
+    url = f"{API_PREFIX}{wish_id}"
+
+    stale = client_with_user.patch(
+        url, json={"title": "Nope"}, headers={"If-Match": f'"{wish_id}-9"'}
+    )
+    assert stale.status_code == 412
+
+    updated = client_with_user.patch(
+        url, json={"title": "Yes"}, headers={"If-Match": f'"{wish_id}-1"'}
+    )
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] == f'"{wish_id}-2"'
+
+    assert (
+        client_with_user.delete(url, headers={"If-Match": f'"{wish_id}-1"'}).status_code
+        == 412
+    )
+    assert (
+        client_with_user.delete(url, headers={"If-Match": f'"{wish_id}-2"'}).status_code
+        == 200
+    )
+
+
+def test_list_wishes_cache_hits_and_invalidation(client_with_user):
+    wish_id = client_with_user.post(API_PREFIX, json={"title": "C1"}).json()["id"]
+
+    first = client_with_user.get(API_PREFIX)
+    assert first.headers["X-Cache"] == "MISS"
+    second = client_with_user.get(API_PREFIX)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert (
+        client_with_user.get(
+            API_PREFIX, headers={"If-None-Match": first.headers["ETag"]}
+        ).status_code
+        == 304
+    )
+    other_page = client_with_user.get(API_PREFIX, params={"limit": 1})
+    assert other_page.headers["X-Cache"] == "MISS"
+
+    client_with_user.patch(f"{API_PREFIX}{wish_id}", json={"title": "C1 edited"})
+    edited = client_with_user.get(API_PREFIX)
+    assert edited.headers["X-Cache"] == "MISS"
+    assert edited.json()[0]["title"] == "C1 edited"
+
+    client_with_user.post(
+        f"{API_PREFIX}batch",
+        json={"operations": [{"op": "delete", "id": wish_id}]},
+    )
+    assert client_with_user.get(API_PREFIX).json() == []
+    assert list_cache.stats()["hits"] == 2
+
+
+def test_search_wishes_ranked_scoped_and_paged(client_with_user, session):
+    for title, notes in [
+        ("Road bike", None),
+        ("Helmet", "for the road bike"),
+        ("Bike lights", "bright"),
+        ("Book", "about cafés"),
+    ]:
+        client_with_user.post(API_PREFIX, json={"title": title, "notes": notes})
+    other = User(username="searcher", password_hash="x")
+    session.add(other)
+    session.commit()
+    session.add(Wish(title="Other bike", owner_id=other.id))
+    session.commit()
+    # The owner token is part of the match, so FTS never yields other owners.
+    match = wish_match_expression(other.id, "bike")
+    fts_rows = session.execute(
+        text("SELECT count(*) FROM wish_fts WHERE wish_fts MATCH :m"), {"m": match}
+    )
+    assert fts_rows.scalar() == 1
+
+    r = client_with_user.get(f"{API_PREFIX}search", params={"q": "bike"})
+    assert r.status_code == 200
+    titles = [w["title"] for w in r.json()]
+    assert set(titles) == {"Road bike", "Helmet", "Bike lights"}
+    assert titles[-1] == "Helmet"
+
+    r = client_with_user.get(f"{API_PREFIX}search", params={"q": "road bi"})
+    assert [w["title"] for w in r.json()] == ["Road bike", "Helmet"]
+    r = client_with_user.get(f"{API_PREFIX}search", params={"q": "cafe"})
+    assert [w["title"] for w in r.json()] == ["Book"]
+    r = client_with_user.get(f"{API_PREFIX}search", params={"q": '"*'})
+    assert r.json() == []
+
+    seen = []
+    params = {"q": "bike", "limit": 2}
+    while True:
+        r = client_with_user.get(f"{API_PREFIX}search", params=params)
+        seen += [w["title"] for w in r.json()]
+        if "X-Next-Cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["X-Next-Cursor"]
+        assert r.headers["X-Cache"] == "MISS"
+    assert seen == titles
+    repeat = client_with_user.get(f"{API_PREFIX}search", params={"q": "bike"})
+    assert repeat.headers["X-Cache"] == "MISS"
+    cursor = encode_cursor("offset", 2)
+    invalid = client_with_user.get(
+        f"{API_PREFIX}search", params={"q": "bike", "cursor": cursor}
+    )
+    assert invalid.status_code == 400
+
+    wish_id = r.json()[-1]["id"]
+    client_with_user.patch(f"{API_PREFIX}{wish_id}", json={"title": "Headgear"})
+    r = client_with_user.get(f"{API_PREFIX}search", params={"q": "headgear"})
+    assert r.headers["X-Cache"] == "MISS"
+    assert [w["id"] for w in r.json()] == [wish_id]
+    client_with_user.delete(f"{API_PREFIX}{wish_id}")
+    assert client_with_user.get(f"{API_PREFIX}search", params={"q": "bike"}).json()
+    assert (
+        client_with_user.get(f"{API_PREFIX}search", params={"q": "headgear"}).json()
+        == []
+    )
+
+
+def test_list_wishes_cache_entries_expire(client_with_user, mocker):
+    client_with_user.post(API_PREFIX, json={"title": "T1"})
+    mocker.patch("src.wishlist_api.app.api.wishes.LIST_CACHE_TTL_SECONDS", 0)
+
+    assert client_with_user.get(API_PREFIX).headers["X-Cache"] == "MISS"
+    assert client_with_user.get(API_PREFIX).headers["X-Cache"] == "MISS"